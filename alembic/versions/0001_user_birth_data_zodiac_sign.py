@@ -0,0 +1,57 @@
+"""
+Денормализованный знак зодиака в user_birth_data.
+
+Добавляет колонку zodiac_sign и заполняет ее для существующих записей
+одним UPDATE с выражением CASE по месяцу и дню рождения.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Добавление и заполнение колонки zodiac_sign."""
+    op.execute(
+        "ALTER TABLE user_birth_data "
+        "ADD COLUMN IF NOT EXISTS zodiac_sign VARCHAR(16)"
+    )
+    op.execute(
+        """
+        UPDATE user_birth_data
+        SET zodiac_sign = CASE
+            WHEN md >= 1222 OR md < 120 THEN 'Козерог'
+            WHEN md < 219 THEN 'Водолей'
+            WHEN md < 321 THEN 'Рыбы'
+            WHEN md < 420 THEN 'Овен'
+            WHEN md < 521 THEN 'Телец'
+            WHEN md < 621 THEN 'Близнецы'
+            WHEN md < 723 THEN 'Рак'
+            WHEN md < 823 THEN 'Лев'
+            WHEN md < 923 THEN 'Дева'
+            WHEN md < 1023 THEN 'Весы'
+            WHEN md < 1122 THEN 'Скорпион'
+            ELSE 'Стрелец'
+        END
+        FROM (
+            SELECT id AS birth_id,
+                   EXTRACT(month FROM birth_date) * 100
+                   + EXTRACT(day FROM birth_date) AS md
+            FROM user_birth_data
+        ) AS computed
+        WHERE user_birth_data.id = computed.birth_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Удаление колонки zodiac_sign."""
+    op.execute("ALTER TABLE user_birth_data DROP COLUMN IF EXISTS zodiac_sign")
@@ -0,0 +1,58 @@
+"""
+Частичный индекс избранных раскладов.
+
+Индексирует только строки с is_favorite = true вместо всех раскладов.
+
+Индексы создаются CONCURRENTLY вне транзакции (autocommit_block),
+чтобы не блокировать запись в таблицы на время построения.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_index(name: str, definition: str) -> None:
+    """
+    Пересоздание индекса без блокировки записи в таблицу.
+
+    Новый индекс строится CONCURRENTLY под временным именем и только потом
+    заменяет старый, поэтому запросы не остаются без индекса. Вызывается
+    внутри autocommit_block: CONCURRENTLY нельзя выполнять в транзакции.
+
+    Args:
+        name: Имя индекса
+        definition: Определение индекса после имени (ON ...)
+    """
+    temp_name = f"{name}_new"
+    # Остаток прерванной сборки (невалидный индекс) мешал бы IF NOT EXISTS
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {temp_name} {definition}")
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"ALTER INDEX {temp_name} RENAME TO {name}")
+
+
+def upgrade() -> None:
+    """Замена индекса избранного на частичный."""
+    with op.get_context().autocommit_block():
+        _rebuild_index(
+            "idx_reading_favorites",
+            "ON tarot_readings (user_id) WHERE is_favorite"
+        )
+
+
+def downgrade() -> None:
+    """Возврат к полному составному индексу."""
+    with op.get_context().autocommit_block():
+        _rebuild_index(
+            "idx_reading_favorites",
+            "ON tarot_readings (user_id, is_favorite)"
+        )
@@ -0,0 +1,94 @@
+"""
+Денормализованный счетчик избранных раскладов пользователя.
+
+Добавляет users.favorites_count, заполняет его по текущим данным и
+устанавливает триггер на tarot_readings, который поддерживает счетчик.
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+# DDL зафиксирован в ревизии, а не импортируется из моделей: изменение
+# моделей не должно менять уже примененную миграцию
+FAVORITES_COUNT_FUNCTION_DDL = """
+CREATE OR REPLACE FUNCTION update_user_favorites_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.is_favorite THEN
+            UPDATE users SET favorites_count = favorites_count + 1
+            WHERE id = NEW.user_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF OLD.is_favorite THEN
+            UPDATE users SET favorites_count = favorites_count - 1
+            WHERE id = OLD.user_id;
+        END IF;
+    ELSIF OLD.is_favorite IS DISTINCT FROM NEW.is_favorite THEN
+        UPDATE users
+        SET favorites_count = favorites_count + CASE WHEN NEW.is_favorite THEN 1 ELSE -1 END
+        WHERE id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+"""
+
+FAVORITES_COUNT_TRIGGER_DDL = """
+CREATE TRIGGER trg_tarot_readings_favorites_count
+AFTER INSERT OR DELETE OR UPDATE OF is_favorite ON tarot_readings
+FOR EACH ROW EXECUTE FUNCTION update_user_favorites_count()
+"""
+
+
+def upgrade() -> None:
+    """Добавление счетчика, заполнение и установка триггера."""
+    op.execute(
+        "ALTER TABLE users "
+        "ADD COLUMN IF NOT EXISTS favorites_count INTEGER NOT NULL DEFAULT 0"
+    )
+    op.execute(
+        """
+        UPDATE users
+        SET favorites_count = counts.total
+        FROM (
+            SELECT user_id, COUNT(*) AS total
+            FROM tarot_readings
+            WHERE is_favorite
+            GROUP BY user_id
+        ) AS counts
+        WHERE users.id = counts.user_id
+        """
+    )
+    op.execute(
+        "ALTER TABLE users DROP CONSTRAINT IF EXISTS check_favorites_count_positive"
+    )
+    op.execute(
+        "ALTER TABLE users ADD CONSTRAINT check_favorites_count_positive "
+        "CHECK (favorites_count >= 0)"
+    )
+    op.execute(FAVORITES_COUNT_FUNCTION_DDL)
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_tarot_readings_favorites_count ON tarot_readings"
+    )
+    op.execute(FAVORITES_COUNT_TRIGGER_DDL)
+
+
+def downgrade() -> None:
+    """Удаление триггера и счетчика."""
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_tarot_readings_favorites_count ON tarot_readings"
+    )
+    op.execute("DROP FUNCTION IF EXISTS update_user_favorites_count()")
+    op.execute(
+        "ALTER TABLE users DROP CONSTRAINT IF EXISTS check_favorites_count_positive"
+    )
+    op.execute("ALTER TABLE users DROP COLUMN IF EXISTS favorites_count")
@@ -0,0 +1,58 @@
+"""
+Перевод JSON-колонок пользователей и Таро на JSONB.
+
+Меняет тип колонок на JSONB и добавляет GIN-индексы для поиска
+по тегам сохраненных раскладов и ключевым словам карт.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Таблица -> колонки, переводимые на JSONB
+JSONB_COLUMNS = {
+    "user_birth_data": ("natal_chart_cache",),
+    "user_settings": ("custom_settings",),
+    "tarot_cards": ("alternative_names", "keywords_upright", "keywords_reversed"),
+    "tarot_spreads": ("positions",),
+    "tarot_readings": ("cards_drawn", "context_data"),
+    "saved_readings": ("tags",),
+}
+
+
+def _alter_columns(target_type: str) -> None:
+    """Изменение типа всех колонок из JSONB_COLUMNS."""
+    for table, columns in JSONB_COLUMNS.items():
+        for column in columns:
+            op.execute(
+                f"ALTER TABLE {table} ALTER COLUMN {column} "
+                f"TYPE {target_type} USING {column}::{target_type}"
+            )
+
+
+def upgrade() -> None:
+    """Перевод колонок на JSONB и создание GIN-индексов."""
+    _alter_columns("jsonb")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_saved_tags_gin "
+        "ON saved_readings USING gin (tags)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_card_keywords_gin "
+        "ON tarot_cards USING gin (keywords_upright)"
+    )
+
+
+def downgrade() -> None:
+    """Удаление GIN-индексов и возврат к JSON."""
+    op.execute("DROP INDEX IF EXISTS idx_card_keywords_gin")
+    op.execute("DROP INDEX IF EXISTS idx_saved_tags_gin")
+    _alter_columns("json")
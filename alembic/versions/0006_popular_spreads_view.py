@@ -0,0 +1,46 @@
+"""
+Материализованное представление рейтинга раскладов.
+
+Создает mv_popular_spreads с уникальным индексом, необходимым
+для REFRESH MATERIALIZED VIEW CONCURRENTLY.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+# DDL зафиксирован в ревизии, а не импортируется из моделей: изменение
+# моделей не должно менять уже примененную миграцию
+POPULAR_SPREADS_VIEW_DDL = """
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_popular_spreads AS
+SELECT id, code, name, card_count, is_premium, usage_count
+FROM tarot_spreads
+WHERE is_active
+ORDER BY usage_count DESC
+LIMIT 50
+"""
+
+# Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+POPULAR_SPREADS_INDEX_DDL = (
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_popular_spreads_id "
+    "ON mv_popular_spreads (id)"
+)
+
+
+def upgrade() -> None:
+    """Создание представления и его уникального индекса."""
+    op.execute(POPULAR_SPREADS_VIEW_DDL)
+    op.execute(POPULAR_SPREADS_INDEX_DDL)
+
+
+def downgrade() -> None:
+    """Удаление представления."""
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_popular_spreads")
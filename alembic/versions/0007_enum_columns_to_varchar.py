@@ -0,0 +1,67 @@
+"""
+Перевод колонок-перечислений пользователей и Таро на VARCHAR + CHECK.
+
+Нативные типы ENUM хранили имена элементов (ACTIVE, MAJOR_ARCANA),
+после миграции в колонках хранятся значения (active, major_arcana),
+а допустимые значения ограничиваются CHECK-ограничением.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+from config import SubscriptionTier, UserRole
+from infrastructure.database.models.user import UserStatus
+from infrastructure.database.models.tarot import CardType, ReadingType
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0007"
+down_revision = "0006"
+branch_labels = None
+depends_on = None
+
+# (таблица, колонка, перечисление, имя CHECK, нативный тип ENUM)
+ENUM_COLUMNS = (
+    ("users", "status", UserStatus, "ck_user_status", "userstatus"),
+    ("users", "role", UserRole, "ck_user_role", "userrole"),
+    ("users", "subscription_tier", SubscriptionTier,
+     "ck_user_subscription_tier", "subscriptiontier"),
+    ("tarot_cards", "card_type", CardType, "ck_card_type", "cardtype"),
+    ("tarot_readings", "reading_type", ReadingType, "ck_reading_type", "readingtype"),
+)
+
+# Типы, которые больше нигде не используются (subscriptiontier еще
+# используется таблицами подписок)
+DROPPED_TYPES = ("userstatus", "userrole", "cardtype", "readingtype")
+
+
+def upgrade() -> None:
+    """Перевод ENUM-колонок на VARCHAR(24) с CHECK-ограничениями."""
+    for table, column, enum_class, check_name, _ in ENUM_COLUMNS:
+        values = ", ".join(f"'{member.value}'" for member in enum_class)
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE VARCHAR(24) USING lower({column}::text)"
+        )
+        op.execute(
+            f"ALTER TABLE {table} ADD CONSTRAINT {check_name} "
+            f"CHECK ({column} IN ({values}))"
+        )
+
+    for type_name in DROPPED_TYPES:
+        op.execute(f"DROP TYPE IF EXISTS {type_name}")
+
+
+def downgrade() -> None:
+    """Возврат к нативным типам ENUM."""
+    for table, column, enum_class, check_name, type_name in ENUM_COLUMNS:
+        names = ", ".join(f"'{member.name}'" for member in enum_class)
+        op.execute(f"ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {check_name}")
+        if type_name in DROPPED_TYPES:
+            op.execute(f"CREATE TYPE {type_name} AS ENUM ({names})")
+        op.execute(
+            f"ALTER TABLE {table} ALTER COLUMN {column} "
+            f"TYPE {type_name} USING upper({column})::{type_name}"
+        )
@@ -0,0 +1,63 @@
+"""
+BRIN-индексы для монотонных временных колонок.
+
+Удаляет одиночные btree-индексы users.last_activity_at и
+users.subscription_expires_at и создает BRIN-индексы для
+users.last_activity_at и tarot_readings.created_at.
+
+Также удаляет btree-индексы ix_<таблица>_created_at, которые могли
+остаться от TimestampMixin.created_at(index=True) в базах, созданных
+не из текущих моделей. В моделях этих индексов нет, поэтому при откате
+они не восстанавливаются.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0008"
+down_revision = "0007"
+branch_labels = None
+depends_on = None
+
+# Таблицы с колонкой created_at из TimestampMixin
+TIMESTAMP_TABLES = (
+    "users", "user_birth_data", "user_settings", "user_consents",
+    "subscription_plans", "subscriptions", "payments", "promo_codes",
+    "payment_methods", "tarot_decks", "tarot_cards", "tarot_spreads",
+    "tarot_readings", "saved_readings", "natal_charts", "transits",
+    "synastries", "astro_forecasts",
+)
+
+
+def upgrade() -> None:
+    """Замена btree-индексов времени на BRIN."""
+    op.execute("DROP INDEX IF EXISTS ix_users_last_activity_at")
+    op.execute("DROP INDEX IF EXISTS ix_users_subscription_expires_at")
+    for table in TIMESTAMP_TABLES:
+        op.execute(f"DROP INDEX IF EXISTS ix_{table}_created_at")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS brin_users_activity "
+        "ON users USING brin (last_activity_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS brin_reading_created "
+        "ON tarot_readings USING brin (created_at)"
+    )
+
+
+def downgrade() -> None:
+    """Возврат btree-индексов времени."""
+    op.execute("DROP INDEX IF EXISTS brin_reading_created")
+    op.execute("DROP INDEX IF EXISTS brin_users_activity")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_subscription_expires_at "
+        "ON users (subscription_expires_at)"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_users_last_activity_at "
+        "ON users (last_activity_at)"
+    )
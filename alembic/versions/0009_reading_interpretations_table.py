@@ -0,0 +1,88 @@
+"""
+Вынос интерпретаций раскладов в отдельную таблицу.
+
+Создает tarot_reading_interpretations (1:1 с tarot_readings), переносит
+существующие интерпретации и удаляет колонки из tarot_readings.
+
+Revision ID: 0009
+Revises: 0008
+Create Date: 2026-10-17
+"""
+
+import sqlalchemy as sa
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0009"
+down_revision = "0008"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание таблицы интерпретаций и перенос данных."""
+    op.create_table(
+        "tarot_reading_interpretations",
+        sa.Column("id", sa.BigInteger(), primary_key=True),
+        sa.Column(
+            "reading_id",
+            sa.BigInteger(),
+            sa.ForeignKey("tarot_readings.id", ondelete="CASCADE"),
+            nullable=False,
+            unique=True
+        ),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("interpretation_model", sa.String(50), nullable=True),
+        sa.Column("interpretation_tokens", sa.Integer(), nullable=True),
+        sa.Column(
+            "created_at", sa.DateTime(timezone=True),
+            nullable=False, server_default=sa.func.now()
+        ),
+        sa.Column(
+            "updated_at", sa.DateTime(timezone=True),
+            nullable=False, server_default=sa.func.now()
+        ),
+    )
+    op.create_index(
+        "ix_tarot_reading_interpretations_id",
+        "tarot_reading_interpretations",
+        ["id"]
+    )
+    op.execute(
+        """
+        INSERT INTO tarot_reading_interpretations
+            (reading_id, body, interpretation_model, interpretation_tokens,
+             created_at, updated_at)
+        SELECT id, interpretation, interpretation_model, interpretation_tokens,
+               created_at, updated_at
+        FROM tarot_readings
+        WHERE interpretation IS NOT NULL
+        """
+    )
+    op.drop_column("tarot_readings", "interpretation_tokens")
+    op.drop_column("tarot_readings", "interpretation_model")
+    op.drop_column("tarot_readings", "interpretation")
+
+
+def downgrade() -> None:
+    """Возврат интерпретаций в tarot_readings."""
+    op.add_column("tarot_readings", sa.Column("interpretation", sa.Text(), nullable=True))
+    op.add_column(
+        "tarot_readings",
+        sa.Column("interpretation_model", sa.String(50), nullable=True)
+    )
+    op.add_column(
+        "tarot_readings",
+        sa.Column("interpretation_tokens", sa.Integer(), nullable=True)
+    )
+    op.execute(
+        """
+        UPDATE tarot_readings
+        SET interpretation = i.body,
+            interpretation_model = i.interpretation_model,
+            interpretation_tokens = i.interpretation_tokens
+        FROM tarot_reading_interpretations AS i
+        WHERE i.reading_id = tarot_readings.id
+        """
+    )
+    op.drop_table("tarot_reading_interpretations")
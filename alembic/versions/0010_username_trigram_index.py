@@ -0,0 +1,32 @@
+"""
+Триграммный индекс для поиска по username.
+
+Подключает расширение pg_trgm и создает GIN-индекс users.username
+с классом операторов gin_trgm_ops для фильтров FilterOperator.TRGM.
+
+Revision ID: 0010
+Revises: 0009
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0010"
+down_revision = "0009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание расширения pg_trgm и триграммного индекса."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS idx_users_username_trgm "
+        "ON users USING gin (username gin_trgm_ops)"
+    )
+
+
+def downgrade() -> None:
+    """Удаление триграммного индекса (расширение остается)."""
+    op.execute("DROP INDEX IF EXISTS idx_users_username_trgm")
@@ -0,0 +1,42 @@
+"""
+Индексы для подсчета использований промокода пользователем.
+
+Создает индексы subscriptions (promo_code_id, payment_id) и
+payments (user_id, id), по которым проверяется лимит
+max_uses_per_user без просмотра всех платежей пользователя.
+
+Индексы создаются CONCURRENTLY вне транзакции (autocommit_block),
+чтобы не блокировать запись в таблицы на время построения.
+
+Revision ID: 0011
+Revises: 0010
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0011"
+down_revision = "0010"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание индексов использований промокодов."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_subscription_promo_payment "
+            "ON subscriptions (promo_code_id, payment_id)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_payment_user "
+            "ON payments (user_id, id)"
+        )
+
+
+def downgrade() -> None:
+    """Удаление индексов использований промокодов."""
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_payment_user")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_subscription_promo_payment")
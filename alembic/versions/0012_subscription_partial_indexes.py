@@ -0,0 +1,59 @@
+"""
+Частичные индексы для запросов подписок и платежей.
+
+Заменяет индексы idx_subscription_active и idx_subscription_renewal
+частичными sub_active_by_user и sub_renewal_due (без отмененных
+подписок) и создает индекс истории платежей pay_user_created.
+
+Индексы создаются CONCURRENTLY вне транзакции (autocommit_block),
+чтобы не блокировать запись в таблицы на время построения.
+
+Revision ID: 0012
+Revises: 0011
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0012"
+down_revision = "0011"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание частичных индексов вместо полных."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS sub_active_by_user "
+            "ON subscriptions (user_id, expires_at DESC) "
+            "WHERE is_cancelled = false"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS sub_renewal_due "
+            "ON subscriptions (next_payment_date) "
+            "WHERE is_auto_renew = true AND is_cancelled = false"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS pay_user_created "
+            "ON payments (user_id, created_at DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_subscription_active")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS idx_subscription_renewal")
+
+
+def downgrade() -> None:
+    """Возврат полных индексов подписок."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_subscription_renewal "
+            "ON subscriptions (is_auto_renew, next_payment_date)"
+        )
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS idx_subscription_active "
+            "ON subscriptions (user_id, expires_at)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS pay_user_created")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS sub_renewal_due")
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS sub_active_by_user")
@@ -0,0 +1,41 @@
+"""
+Индекс для keyset-пагинации истории платежей.
+
+Заменяет pay_user_created индексом pay_user_created_id, в который
+добавлен id: курсор (created_at, id) проверяется прямо по индексу.
+
+Индексы создаются CONCURRENTLY вне транзакции (autocommit_block),
+чтобы не блокировать запись в таблицы на время построения.
+
+Revision ID: 0013
+Revises: 0012
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0013"
+down_revision = "0012"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    """Создание индекса (user_id, created_at DESC, id DESC)."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS pay_user_created_id "
+            "ON payments (user_id, created_at DESC, id DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS pay_user_created")
+
+
+def downgrade() -> None:
+    """Возврат индекса без id."""
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS pay_user_created "
+            "ON payments (user_id, created_at DESC)"
+        )
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS pay_user_created_id")
@@ -0,0 +1,69 @@
+"""
+Индексы истории раскладов для keyset-пагинации.
+
+Добавляет id в idx_reading_user_date и idx_saved_user_date: курсор
+(created_at, id) и сортировка списков обслуживаются индексом.
+
+Индексы создаются CONCURRENTLY вне транзакции (autocommit_block),
+чтобы не блокировать запись в таблицы на время построения.
+
+Revision ID: 0014
+Revises: 0013
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+# Идентификаторы ревизии, используемые Alembic
+revision = "0014"
+down_revision = "0013"
+branch_labels = None
+depends_on = None
+
+
+def _rebuild_index(name: str, definition: str) -> None:
+    """
+    Пересоздание индекса без блокировки записи в таблицу.
+
+    Новый индекс строится CONCURRENTLY под временным именем и только потом
+    заменяет старый, поэтому запросы не остаются без индекса. Вызывается
+    внутри autocommit_block: CONCURRENTLY нельзя выполнять в транзакции.
+
+    Args:
+        name: Имя индекса
+        definition: Определение индекса после имени (ON ...)
+    """
+    temp_name = f"{name}_new"
+    # Остаток прерванной сборки (невалидный индекс) мешал бы IF NOT EXISTS
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {temp_name}")
+    op.execute(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {temp_name} {definition}")
+    op.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+    op.execute(f"ALTER INDEX {temp_name} RENAME TO {name}")
+
+
+def upgrade() -> None:
+    """Пересоздание индексов истории раскладов с id."""
+    with op.get_context().autocommit_block():
+        _rebuild_index(
+            "idx_reading_user_date",
+            "ON tarot_readings (user_id, created_at DESC, id DESC) "
+            "INCLUDE (reading_type, is_favorite) WHERE is_deleted = false"
+        )
+        _rebuild_index(
+            "idx_saved_user_date",
+            "ON saved_readings (user_id, created_at DESC, id DESC)"
+        )
+
+
+def downgrade() -> None:
+    """Возврат индексов без id."""
+    with op.get_context().autocommit_block():
+        _rebuild_index(
+            "idx_reading_user_date",
+            "ON tarot_readings (user_id, created_at DESC) "
+            "INCLUDE (reading_type, is_favorite) WHERE is_deleted = false"
+        )
+        _rebuild_index(
+            "idx_saved_user_date",
+            "ON saved_readings (user_id, created_at DESC)"
+        )
@@ -32,6 +32,7 @@ from core.interfaces.repository import (
 
     # Вспомогательные классы для запросов
     SortOrder,
+    FilterOperator,
     SortBy,
     Pagination,
     Filter,
@@ -242,6 +243,7 @@ __all__ = [
 
     # Классы для запросов
     "SortOrder",
+    "FilterOperator",
     "SortBy",
     "Pagination",
     "Filter",
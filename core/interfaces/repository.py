@@ -46,6 +46,24 @@ class SortOrder(str, Enum):
     DESC = "desc"
 
 
+class FilterOperator(str, Enum):
+    """Операторы сравнения в фильтрах."""
+    EQ = "eq"
+    NE = "ne"
+    GT = "gt"
+    GTE = "gte"
+    LT = "lt"
+    LTE = "lte"
+    IN = "in"
+    NOT_IN = "not_in"
+    LIKE = "like"
+    ILIKE = "ilike"
+    PREFIX = "prefix"  # LIKE 'value%' - использует btree-индекс
+    TRGM = "trgm"  # pg_trgm: field % value - использует GIN gin_trgm_ops
+    IS_NULL = "is_null"
+    BETWEEN = "between"
+
+
 @dataclass
 class SortBy:
     """Параметры сортировки."""
@@ -55,9 +73,20 @@ class SortBy:
 
 @dataclass
 class Pagination:
-    """Параметры пагинации."""
+    """
+    Параметры пагинации.
+
+    Если задан after, используется keyset-пагинация без OFFSET и без
+    подсчета общего количества. after - курсор из Page.next_cursor
+    предыдущей страницы: кортеж значений ключа сортировки последней
+    записи. Порядок и состав ключа определяет метод репозитория, для
+    вызывающего кода курсор непрозрачен. sort_key задает ключ в
+    BaseRepository.get_page.
+    """
     page: int = 1
     page_size: int = 20
+    after: Optional[Any] = None
+    sort_key: str = "id"
 
     @property
     def offset(self) -> int:
@@ -99,20 +128,30 @@ class QueryOptions:
 
 @dataclass
 class Page(Generic[T]):
-    """Страница результатов с метаданными."""
+    """
+    Страница результатов с метаданными.
+
+    В режиме keyset-пагинации total не считается (None), а для
+    следующей страницы используется next_cursor.
+    """
     items: List[T]
-    total: int
+    total: Optional[int]
     page: int
     page_size: int
+    next_cursor: Optional[Any] = None
 
     @property
     def total_pages(self) -> int:
-        """Общее количество страниц."""
+        """Общее количество страниц (0, если total неизвестен)."""
+        if self.total is None:
+            return 0
         return (self.total + self.page_size - 1) // self.page_size
 
     @property
     def has_next(self) -> bool:
         """Есть ли следующая страница."""
+        if self.total is None:
+            return self.next_cursor is not None
         return self.page < self.total_pages
 
     @property
@@ -499,6 +538,8 @@ class IUnitOfWork(ABC):
     Обеспечивает атомарность операций над несколькими репозиториями.
     """
 
+    __slots__ = ()
+
     # Репозитории
     users: IUserRepository
     subscriptions: ISubscriptionRepository
@@ -532,6 +573,8 @@ class IUnitOfWork(ABC):
 class IRepositoryFactory(ABC):
     """Интерфейс фабрики репозиториев."""
 
+    __slots__ = ()
+
     @abstractmethod
     def create_user_repository(self) -> IUserRepository:
         """Создать репозиторий пользователей."""
@@ -579,6 +622,7 @@ __all__ = [
 
     # Вспомогательные классы
     "SortOrder",
+    "FilterOperator",
     "SortBy",
     "Pagination",
     "Filter",
@@ -51,8 +51,8 @@ from infrastructure.database.models import (
 from infrastructure.database.repositories import (
     BaseRepository, UserRepository, TarotRepository, SubscriptionRepository,
     UnitOfWork, get_unit_of_work, RepositoryFactory,
-    get_user_by_telegram_id, create_or_update_user_from_telegram,
-    create_tarot_reading
+    get_user_by_telegram_id, get_users_by_telegram_ids, get_cached_user_snapshot,
+    create_or_update_user_from_telegram, create_tarot_reading
 )
 
 # Экспорт всех компонентов
@@ -27,10 +27,27 @@ from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.pool import NullPool, AsyncAdaptedQueuePool
 from sqlalchemy.exc import DBAPIError, SQLAlchemyError
 
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 from config import settings, logger
 from core.exceptions import DatabaseConnectionError
 
 
+def _orjson_serializer(value: Any) -> str:
+    """
+    Сериализация JSON/JSONB колонок через orjson.
+
+    OPT_NON_STR_KEYS приводит нестроковые ключи словарей к строкам, как
+    это делал json.dumps; без него orjson выбрасывает TypeError.
+    """
+    return orjson.dumps(value, option=orjson.OPT_NON_STR_KEYS).decode()
+
+
 class Base(DeclarativeBase):
     """
     Базовый класс для всех моделей SQLAlchemy.
@@ -151,6 +168,14 @@ class DatabaseConnection:
                 pool_timeout = getattr(settings.database, 'pool_timeout', 30)
                 connect_args["timeout"] = pool_timeout
 
+                # Быстрая (де)сериализация JSON/JSONB колонок, если доступен orjson
+                json_options = {}
+                if ORJSON_AVAILABLE:
+                    json_options = {
+                        "json_serializer": _orjson_serializer,
+                        "json_deserializer": orjson.loads
+                    }
+
                 # Создание движка SQLAlchemy
                 self._engine = create_async_engine(
                     self._connection_string,
@@ -161,7 +186,8 @@ class DatabaseConnection:
                     pool_recycle=self._pool_recycle,
                     pool_pre_ping=self._pool_pre_ping,
                     poolclass=pool_class,
-                    connect_args=connect_args
+                    connect_args=connect_args,
+                    **json_options
                 )
 
                 # Создание фабрики сессий
@@ -37,8 +37,8 @@ from infrastructure.database.models.subscription import (
 
 # Импорт моделей Таро
 from infrastructure.database.models.tarot import (
-    TarotDeck, TarotCard, TarotSpread, TarotReading, SavedReading,
-    CardType, ReadingType
+    TarotDeck, TarotCard, TarotSpread, TarotReading, TarotReadingInterpretation,
+    SavedReading, PopularSpread, CardType, ReadingType
 )
 
 # Импорт астрологических моделей
@@ -62,7 +62,8 @@ __all__ = [
     'PaymentStatus', 'PaymentProvider', 'PromoCodeType',
 
     # Модели Таро
-    'TarotDeck', 'TarotCard', 'TarotSpread', 'TarotReading', 'SavedReading',
+    'TarotDeck', 'TarotCard', 'TarotSpread', 'TarotReading',
+    'TarotReadingInterpretation', 'SavedReading', 'PopularSpread',
     'CardType', 'ReadingType',
 
     # Астрологические модели
@@ -97,6 +98,7 @@ ALL_MODELS: List[Type[BaseModel]] = [
     TarotCard,
     TarotSpread,
     TarotReading,
+    TarotReadingInterpretation,
     SavedReading,
 
     # Астрология (зависит от User)
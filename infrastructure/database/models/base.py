@@ -10,17 +10,19 @@
 """
 
 from datetime import datetime
+from enum import Enum
 from typing import Any, Dict, Optional, Type, TypeVar, List
 from uuid import uuid4
 
 from sqlalchemy import (
     BigInteger, Column, DateTime, String, Boolean,
-    Integer, func, text, Index, event
+    Integer, func, text, Index, event, CheckConstraint
 )
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.ext.declarative import declared_attr
 from sqlalchemy.orm import Session, declarative_mixin
 from sqlalchemy.sql import expression
+from sqlalchemy.types import TypeDecorator
 
 from config import logger
 from infrastructure.database.connection import Base
@@ -29,6 +31,62 @@ from infrastructure.database.connection import Base
 T = TypeVar('T', bound='BaseModel')
 
 
+class StringEnum(TypeDecorator):
+    """
+    Хранение Python Enum в VARCHAR вместо нативного ENUM PostgreSQL.
+
+    В БД пишется значение (value) элемента перечисления, при чтении
+    строка преобразуется обратно в элемент Enum. Допустимые значения
+    ограничиваются CHECK-ограничением (см. enum_check_constraint).
+    """
+
+    impl = String
+    cache_ok = True
+
+    def __init__(self, enum_class: Type[Enum], length: int = 24, **kwargs):
+        """
+        Инициализация типа.
+
+        Args:
+            enum_class: Класс перечисления
+            length: Длина VARCHAR
+        """
+        super().__init__(length, **kwargs)
+        self.enum_class = enum_class
+
+    def process_bind_param(self, value, dialect):
+        """Преобразование элемента Enum в строку для БД."""
+        if isinstance(value, Enum):
+            return value.value
+        return value
+
+    def process_result_value(self, value, dialect):
+        """Преобразование строки из БД в элемент Enum."""
+        if value is None:
+            return None
+        return self.enum_class(value)
+
+
+def enum_check_constraint(
+        column_name: str,
+        enum_class: Type[Enum],
+        name: str
+) -> CheckConstraint:
+    """
+    CHECK-ограничение на допустимые значения перечисления.
+
+    Args:
+        column_name: Имя колонки
+        enum_class: Класс перечисления
+        name: Имя ограничения
+
+    Returns:
+        Ограничение вида "column IN ('a', 'b', ...)"
+    """
+    values = ", ".join(f"'{member.value}'" for member in enum_class)
+    return CheckConstraint(f"{column_name} IN ({values})", name=name)
+
+
 class BaseModel(Base):
     """
     Базовый класс для всех моделей приложения.
@@ -151,7 +209,6 @@ class TimestampMixin:
         DateTime(timezone=True),
         nullable=False,
         server_default=func.now(),
-        index=True,
         comment="Время создания записи"
     )
 
@@ -216,7 +273,7 @@ class SoftDeleteMixin:
             deleted_by_id: ID пользователя, выполняющего удаление
         """
         self.is_deleted = True
-        self.deleted_at = datetime.utcnow()
+        self.deleted_at = func.now()
         self.deleted_by = deleted_by_id
         logger.info(f"Мягкое удаление {self.__class__.__name__} id={self.id}")
 
@@ -354,13 +411,13 @@ class BaseCachedModel(BaseModel, TimestampMixin):
 @event.listens_for(BaseModel, 'before_update', propagate=True)
 def receive_before_update(mapper, connection, target):
     """
-    Автоматическое обновление updated_at перед сохранением.
+    Служебные изменения перед сохранением.
+
+    updated_at выставляет сама БД через onupdate=func.now(), поэтому
+    здесь время на стороне Python не вычисляется.
 
     Работает для всех наследников BaseModel.
     """
-    if hasattr(target, 'updated_at'):
-        target.updated_at = datetime.utcnow()
-
     # Инкремент версии для аудита
     if hasattr(target, 'version'):
         target.version = (target.version or 0) + 1
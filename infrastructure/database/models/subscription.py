@@ -19,7 +19,7 @@ import string
 from sqlalchemy import (
     Column, String, BigInteger, Boolean, DateTime, Numeric,
     ForeignKey, UniqueConstraint, CheckConstraint, Index,
-    Enum as SQLEnum, JSON, Integer
+    Enum as SQLEnum, JSON, Integer, text
 )
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.ext.hybrid import hybrid_property
@@ -238,8 +238,17 @@ class Subscription(BaseModel, TimestampMixin):
 
     # Ограничения
     __table_args__ = (
-        Index('idx_subscription_active', 'user_id', 'expires_at'),
-        Index('idx_subscription_renewal', 'is_auto_renew', 'next_payment_date'),
+        # Частичные индексы: отмененные подписки в горячие запросы не попадают
+        Index(
+            'sub_active_by_user', 'user_id', text('expires_at DESC'),
+            postgresql_where=text('is_cancelled = false')
+        ),
+        Index(
+            'sub_renewal_due', 'next_payment_date',
+            postgresql_where=text('is_auto_renew = true AND is_cancelled = false')
+        ),
+        # Подсчет использований промокода пользователем
+        Index('idx_subscription_promo_payment', 'promo_code_id', 'payment_id'),
         CheckConstraint('expires_at > started_at', name='check_subscription_period'),
     )
 
@@ -400,6 +409,8 @@ class Payment(BaseTransactionModel):
         CheckConstraint('subscription_period_days > 0', name='check_period_positive'),
         Index('idx_payment_status', 'status', 'created_at'),
         Index('idx_payment_provider', 'provider', 'provider_payment_id'),
+        Index('idx_payment_user', 'user_id', 'id'),
+        Index('pay_user_created_id', 'user_id', text('created_at DESC'), text('id DESC')),
     )
 
     def mark_as_paid(self) -> None:
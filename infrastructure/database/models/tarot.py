@@ -6,28 +6,35 @@
 - Модель TarotDeck для различных колод
 - Модель TarotSpread для типов раскладов
 - Модель TarotReading для истории раскладов пользователей
+- Модель TarotReadingInterpretation для текстов интерпретаций
 - Модель SavedReading для избранных раскладов
+- Представление PopularSpread для рейтинга раскладов
 """
 
-from datetime import datetime
 from typing import Optional, List, Dict
 from enum import Enum
 
 from sqlalchemy import (
     Column, String, BigInteger, Boolean, DateTime, Text,
     ForeignKey, UniqueConstraint, CheckConstraint, Index,
-    Enum as SQLEnum, JSON, Integer, Float
+    Integer, Float, DDL, MetaData, Table, desc, event, text
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, validates
-from sqlalchemy.ext.hybrid import hybrid_property
 
 from config import logger
+from infrastructure.database.connection import Base
 from infrastructure.database.models.base import (
-    BaseModel, TimestampMixin, SoftDeleteMixin
+    BaseModel, TimestampMixin, SoftDeleteMixin,
+    StringEnum, enum_check_constraint
 )
 from core.exceptions import ValidationError
 
 
+# Обязательные ключи каждой карты в TarotReading.cards_drawn
+_CARD_REQUIRED_KEYS = frozenset({'card_id', 'position', 'is_reversed'})
+
+
 class CardType(str, Enum):
     """Тип карты Таро."""
     MAJOR_ARCANA = "major_arcana"  # Старшие арканы (0-21)
@@ -110,6 +117,12 @@ class TarotDeck(BaseModel, TimestampMixin):
 
     # Отношения
     cards = relationship("TarotCard", back_populates="deck")
+    readings = relationship(
+        "TarotReading",
+        back_populates="deck",
+        lazy="raise",
+        passive_deletes=True
+    )
 
     def __repr__(self) -> str:
         return f"<TarotDeck(code={self.code}, name={self.name})>"
@@ -139,7 +152,7 @@ class TarotCard(BaseModel, TimestampMixin):
     )
 
     card_type = Column(
-        SQLEnum(CardType),
+        StringEnum(CardType),
         nullable=False,
         comment="Тип карты"
     )
@@ -151,20 +164,20 @@ class TarotCard(BaseModel, TimestampMixin):
     )
 
     alternative_names = Column(
-        JSON,
+        JSONB,
         nullable=True,
         comment="Альтернативные названия"
     )
 
     # Символика и значения
     keywords_upright = Column(
-        JSON,
+        JSONB,
         nullable=False,
         comment="Ключевые слова в прямом положении"
     )
 
     keywords_reversed = Column(
-        JSON,
+        JSONB,
         nullable=False,
         comment="Ключевые слова в перевернутом положении"
     )
@@ -241,37 +254,37 @@ class TarotCard(BaseModel, TimestampMixin):
         UniqueConstraint('deck_id', 'card_number', name='uq_deck_card_number'),
         CheckConstraint('card_number >= 0 AND card_number <= 77',
                         name='check_card_number_range'),
+        enum_check_constraint('card_type', CardType, 'ck_card_type'),
         Index('idx_card_lookup', 'deck_id', 'card_type', 'card_number'),
-    )
-
-    @hybrid_property
+        Index('idx_card_keywords_gin', 'keywords_upright', postgresql_using='gin'),
+    )
+
+    # Справочники для названий младших арканов
+    _SUIT_NAMES = {
+        CardType.WANDS: "Жезлов",
+        CardType.CUPS: "Кубков",
+        CardType.SWORDS: "Мечей",
+        CardType.PENTACLES: "Пентаклей"
+    }
+
+    _RANK_NAMES = {
+        1: "Туз",
+        11: "Паж",
+        12: "Рыцарь",
+        13: "Королева",
+        0: "Король"
+    }
+
+    @property
     def full_name(self) -> str:
         """Полное название с номером."""
         if self.card_type == CardType.MAJOR_ARCANA:
             return f"{self.card_number}. {self.name}"
-        else:
-            # Для младших арканов
-            suit_names = {
-                CardType.WANDS: "Жезлов",
-                CardType.CUPS: "Кубков",
-                CardType.SWORDS: "Мечей",
-                CardType.PENTACLES: "Пентаклей"
-            }
-            suit = suit_names.get(self.card_type, "")
-
-            # Преобразование номера в название
-            if self.card_number % 14 == 1:
-                return f"Туз {suit}"
-            elif self.card_number % 14 == 11:
-                return f"Паж {suit}"
-            elif self.card_number % 14 == 12:
-                return f"Рыцарь {suit}"
-            elif self.card_number % 14 == 13:
-                return f"Королева {suit}"
-            elif self.card_number % 14 == 0:
-                return f"Король {suit}"
-            else:
-                return f"{self.card_number % 14} {suit}"
+
+        # Для младших арканов
+        rank = self.card_number % 14
+        suit = self._SUIT_NAMES.get(self.card_type, "")
+        return f"{self._RANK_NAMES.get(rank, rank)} {suit}"
 
     def __repr__(self) -> str:
         return f"<TarotCard(number={self.card_number}, name={self.name})>"
@@ -313,7 +326,7 @@ class TarotSpread(BaseModel, TimestampMixin):
 
     # Позиции карт
     positions = Column(
-        JSON,
+        JSONB,
         nullable=False,
         comment="Описание позиций карт"
     )
@@ -354,6 +367,14 @@ class TarotSpread(BaseModel, TimestampMixin):
         comment="Количество использований"
     )
 
+    # Отношения (расклады запрашиваются только явно, с пагинацией)
+    readings = relationship(
+        "TarotReading",
+        back_populates="spread",
+        lazy="raise",
+        passive_deletes=True
+    )
+
     # Ограничения
     __table_args__ = (
         CheckConstraint('card_count > 0 AND card_count <= 78',
@@ -366,6 +387,35 @@ class TarotSpread(BaseModel, TimestampMixin):
         return f"<TarotSpread(code={self.code}, cards={self.card_count})>"
 
 
+# Материализованные представления не входят в Base.metadata,
+# чтобы create_all не пытался создавать их как обычные таблицы
+views_metadata = MetaData()
+
+
+class PopularSpread(Base):
+    """
+    Рейтинг популярных раскладов (только чтение).
+
+    Отображение материализованного представления mv_popular_spreads,
+    которое периодически обновляется планировщиком. Чтение рейтинга
+    не конкурирует с обновлением счетчика usage_count.
+    """
+
+    __table__ = Table(
+        "mv_popular_spreads",
+        views_metadata,
+        Column("id", BigInteger, primary_key=True),
+        Column("code", String(50), nullable=False),
+        Column("name", String(100), nullable=False),
+        Column("card_count", Integer, nullable=False),
+        Column("is_premium", Boolean, nullable=False),
+        Column("usage_count", BigInteger, nullable=False),
+    )
+
+    def __repr__(self) -> str:
+        return f"<PopularSpread(code={self.code}, usage={self.usage_count})>"
+
+
 class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
     """
     История раскладов пользователей.
@@ -398,7 +448,7 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
 
     # Тип и вопрос
     reading_type = Column(
-        SQLEnum(ReadingType),
+        StringEnum(ReadingType),
         nullable=False,
         index=True,
         comment="Тип расклада"
@@ -412,33 +462,14 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
 
     # Выпавшие карты
     cards_drawn = Column(
-        JSON,
+        JSONB,
         nullable=False,
         comment="Выпавшие карты с позициями"
     )
 
-    # Интерпретация
-    interpretation = Column(
-        Text,
-        nullable=True,
-        comment="Интерпретация расклада"
-    )
-
-    interpretation_model = Column(
-        String(50),
-        nullable=True,
-        comment="Модель LLM для интерпретации"
-    )
-
-    interpretation_tokens = Column(
-        Integer,
-        nullable=True,
-        comment="Использовано токенов"
-    )
-
     # Дополнительные данные
     context_data = Column(
-        JSON,
+        JSONB,
         nullable=True,
         comment="Контекст расклада"
     )
@@ -472,26 +503,48 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
     )
 
     # Отношения
-    user = relationship("User", backref="tarot_readings")
-    spread = relationship("TarotSpread", backref="readings")
-    deck = relationship("TarotDeck", backref="readings")
+    user = relationship("User", back_populates="tarot_readings")
+    spread = relationship("TarotSpread", back_populates="readings")
+    deck = relationship("TarotDeck", back_populates="readings")
     saved_reading = relationship(
         "SavedReading",
         back_populates="reading",
         uselist=False
     )
+    # Текст интерпретации хранится отдельно и загружается только явно
+    # (joinedload в детальном просмотре), чтобы списки не читали TOAST
+    interpretation = relationship(
+        "TarotReadingInterpretation",
+        back_populates="reading",
+        uselist=False,
+        lazy="raise",
+        cascade="all, delete-orphan"
+    )
 
     # Ограничения
     __table_args__ = (
         CheckConstraint('user_rating >= 1 AND user_rating <= 5',
                         name='check_rating_range'),
-        Index('idx_reading_user_date', 'user_id', 'created_at'),
-        Index('idx_reading_favorites', 'user_id', 'is_favorite'),
-    )
-
-    @validates('cards_drawn')
+        enum_check_constraint('reading_type', ReadingType, 'ck_reading_type'),
+        # Покрывающий частичный индекс для истории раскладов (новые первые)
+        Index(
+            'idx_reading_user_date', 'user_id', desc('created_at'), desc('id'),
+            postgresql_where=text('is_deleted = false'),
+            postgresql_include=['reading_type', 'is_favorite']
+        ),
+        # Частичный индекс только по избранным раскладам
+        Index('idx_reading_favorites', 'user_id', postgresql_where=text('is_favorite')),
+        Index('brin_reading_created', 'created_at', postgresql_using='brin'),
+    )
+
+    @validates('cards_drawn', include_backrefs=False)
     def validate_cards_drawn(self, key, cards_drawn):
-        """Валидация выпавших карт."""
+        """
+        Валидация выпавших карт.
+
+        Вызывается только при присваивании атрибута в коде приложения;
+        при загрузке строк из БД валидаторы не выполняются.
+        """
         if not isinstance(cards_drawn, list):
             raise ValidationError("cards_drawn должен быть списком")
 
@@ -500,13 +553,14 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
             if not isinstance(card, dict):
                 raise ValidationError("Каждая карта должна быть словарем")
 
-            required_keys = {'card_id', 'position', 'is_reversed'}
-            if not required_keys.issubset(card.keys()):
-                raise ValidationError(f"Карта должна содержать ключи: {required_keys}")
+            if not _CARD_REQUIRED_KEYS.issubset(card.keys()):
+                raise ValidationError(
+                    f"Карта должна содержать ключи: {set(_CARD_REQUIRED_KEYS)}"
+                )
 
         return cards_drawn
 
-    @hybrid_property
+    @property
     def cards_summary(self) -> str:
         """Краткое описание выпавших карт."""
         if not self.cards_drawn:
@@ -518,7 +572,12 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
         return f"{count} карт{'а' if count == 1 else ''} ({reversed_count} перевернут{'а' if reversed_count == 1 else 'ых'})"
 
     def add_to_favorites(self) -> None:
-        """Добавление в избранное."""
+        """
+        Добавление в избранное.
+
+        Счетчик users.favorites_count обновляет триггер
+        trg_tarot_readings_favorites_count, поэтому здесь он не меняется.
+        """
         self.is_favorite = True
         logger.info(f"Расклад {self.id} добавлен в избранное")
 
@@ -526,6 +585,49 @@ class TarotReading(BaseModel, TimestampMixin, SoftDeleteMixin):
         return f"<TarotReading(id={self.id}, user_id={self.user_id}, type={self.reading_type})>"
 
 
+class TarotReadingInterpretation(BaseModel, TimestampMixin):
+    """
+    Интерпретация расклада.
+
+    Объемный текст от LLM вынесен из tarot_readings в связь 1:1,
+    чтобы запросы списков раскладов не тянули его с диска и по сети.
+    """
+
+    __tablename__ = "tarot_reading_interpretations"
+
+    reading_id = Column(
+        BigInteger,
+        ForeignKey('tarot_readings.id', ondelete='CASCADE'),
+        unique=True,
+        nullable=False,
+        comment="ID расклада"
+    )
+
+    body = Column(
+        Text,
+        nullable=False,
+        comment="Интерпретация расклада"
+    )
+
+    interpretation_model = Column(
+        String(50),
+        nullable=True,
+        comment="Модель LLM для интерпретации"
+    )
+
+    interpretation_tokens = Column(
+        Integer,
+        nullable=True,
+        comment="Использовано токенов"
+    )
+
+    # Отношения
+    reading = relationship("TarotReading", back_populates="interpretation")
+
+    def __repr__(self) -> str:
+        return f"<TarotReadingInterpretation(reading_id={self.reading_id})>"
+
+
 class SavedReading(BaseModel, TimestampMixin):
     """
     Сохраненные расклады.
@@ -564,7 +666,7 @@ class SavedReading(BaseModel, TimestampMixin):
     )
 
     tags = Column(
-        JSON,
+        JSONB,
         nullable=True,
         default=list,
         comment="Теги для организации"
@@ -600,18 +702,91 @@ class SavedReading(BaseModel, TimestampMixin):
 
     # Отношения
     reading = relationship("TarotReading", back_populates="saved_reading")
-    user = relationship("User", backref="saved_readings")
+    user = relationship("User", back_populates="saved_readings")
 
     # Ограничения
     __table_args__ = (
-        Index('idx_saved_user_date', 'user_id', 'created_at'),
+        Index('idx_saved_user_date', 'user_id', desc('created_at'), desc('id')),
         Index('idx_saved_reminder', 'reminder_date', 'reminder_sent'),
+        Index('idx_saved_tags_gin', 'tags', postgresql_using='gin'),
     )
 
-    def increment_views(self) -> None:
-        """Увеличение счетчика просмотров."""
-        self.view_count += 1
-        self.last_viewed_at = datetime.utcnow()
-
     def __repr__(self) -> str:
-        return f"<SavedReading(reading_id={self.reading_id}, title={self.title})>"
\ No newline at end of file
+        return f"<SavedReading(reading_id={self.reading_id}, title={self.title})>"
+
+# Триггер для поддержки денормализованного счетчика users.favorites_count.
+# Является единственным источником истины, в том числе для массовых UPDATE,
+# выполненных в обход ORM.
+FAVORITES_COUNT_FUNCTION_DDL = DDL("""
+CREATE OR REPLACE FUNCTION update_user_favorites_count() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF NEW.is_favorite THEN
+            UPDATE users SET favorites_count = favorites_count + 1
+            WHERE id = NEW.user_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF OLD.is_favorite THEN
+            UPDATE users SET favorites_count = favorites_count - 1
+            WHERE id = OLD.user_id;
+        END IF;
+    ELSIF OLD.is_favorite IS DISTINCT FROM NEW.is_favorite THEN
+        UPDATE users
+        SET favorites_count = favorites_count + CASE WHEN NEW.is_favorite THEN 1 ELSE -1 END
+        WHERE id = NEW.user_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql
+""")
+
+FAVORITES_COUNT_TRIGGER_DDL = DDL("""
+CREATE TRIGGER trg_tarot_readings_favorites_count
+AFTER INSERT OR DELETE OR UPDATE OF is_favorite ON tarot_readings
+FOR EACH ROW EXECUTE FUNCTION update_user_favorites_count()
+""")
+
+event.listen(
+    TarotReading.__table__,
+    'after_create',
+    FAVORITES_COUNT_FUNCTION_DDL.execute_if(dialect='postgresql')
+)
+event.listen(
+    TarotReading.__table__,
+    'after_create',
+    FAVORITES_COUNT_TRIGGER_DDL.execute_if(dialect='postgresql')
+)
+
+# Материализованное представление рейтинга раскладов
+POPULAR_SPREADS_VIEW_DDL = DDL("""
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_popular_spreads AS
+SELECT id, code, name, card_count, is_premium, usage_count
+FROM tarot_spreads
+WHERE is_active
+ORDER BY usage_count DESC
+LIMIT 50
+""")
+
+# Уникальный индекс обязателен для REFRESH MATERIALIZED VIEW CONCURRENTLY
+POPULAR_SPREADS_INDEX_DDL = DDL(
+    "CREATE UNIQUE INDEX IF NOT EXISTS idx_mv_popular_spreads_id "
+    "ON mv_popular_spreads (id)"
+)
+
+event.listen(
+    TarotSpread.__table__,
+    'after_create',
+    POPULAR_SPREADS_VIEW_DDL.execute_if(dialect='postgresql')
+)
+event.listen(
+    TarotSpread.__table__,
+    'after_create',
+    POPULAR_SPREADS_INDEX_DDL.execute_if(dialect='postgresql')
+)
+event.listen(
+    TarotSpread.__table__,
+    'before_drop',
+    DDL("DROP MATERIALIZED VIEW IF EXISTS mv_popular_spreads").execute_if(
+        dialect='postgresql'
+    )
+)
@@ -9,25 +9,66 @@
 - Индексы и связи между таблицами
 """
 
+import re
 from datetime import datetime, date
 from typing import Optional, List
 from enum import Enum
 
 from sqlalchemy import (
-    Column, String, BigInteger, Boolean, Date, Time, Float,
+    Column, String, BigInteger, Integer, Boolean, Date, DateTime, Time, Float,
     ForeignKey, UniqueConstraint, CheckConstraint, Index,
-    Enum as SQLEnum, JSON, Text
+    Text, DDL, event
 )
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship, validates
-from sqlalchemy.ext.hybrid import hybrid_property
 
 from config import logger, SubscriptionTier, UserRole
 from infrastructure.database.models.base import (
-    BaseUserModel, TimestampMixin, AuditMixin
+    BaseModel, BaseUserModel, TimestampMixin, AuditMixin,
+    StringEnum, enum_check_constraint
 )
 from core.exceptions import ValidationError
 
 
+# Скомпилированный шаблон email (\Z не допускает завершающий перевод строки)
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}\Z')
+
+# Дневные лимиты раскладов по уровням подписки
+DAILY_READINGS_LIMITS = {
+    SubscriptionTier.FREE: 3,
+    SubscriptionTier.BASIC: 10,
+    SubscriptionTier.PREMIUM: 50,
+    SubscriptionTier.VIP: 999999  # Безлимит
+}
+
+# Границы знаков зодиака: (месяц, день начала знака, знак).
+# Индекс кортежа соответствует номеру месяца минус один.
+_ZODIAC_BOUNDARIES = (
+    (1, 20, "Водолей"), (2, 19, "Рыбы"), (3, 21, "Овен"),
+    (4, 20, "Телец"), (5, 21, "Близнецы"), (6, 21, "Рак"),
+    (7, 23, "Лев"), (8, 23, "Дева"), (9, 23, "Весы"),
+    (10, 23, "Скорпион"), (11, 22, "Стрелец"), (12, 22, "Козерог"),
+)
+
+
+def _compute_zodiac(birth_date: date) -> str:
+    """
+    Определение знака зодиака по дате рождения.
+
+    Args:
+        birth_date: Дата рождения
+
+    Returns:
+        Название знака зодиака
+    """
+    month_index = birth_date.month - 1
+    _, start_day, sign = _ZODIAC_BOUNDARIES[month_index]
+    if birth_date.day >= start_day:
+        return sign
+    # До границы месяца действует знак, начавшийся в предыдущем месяце
+    return _ZODIAC_BOUNDARIES[month_index - 1][2]
+
+
 class UserStatus(str, Enum):
     """Статус пользователя в системе."""
     ACTIVE = "active"
@@ -82,7 +123,7 @@ class User(BaseUserModel, AuditMixin):
 
     # Статус и роли
     status = Column(
-        SQLEnum(UserStatus),
+        StringEnum(UserStatus),
         nullable=False,
         default=UserStatus.ACTIVE,
         index=True,
@@ -90,7 +131,7 @@ class User(BaseUserModel, AuditMixin):
     )
 
     role = Column(
-        SQLEnum(UserRole),
+        StringEnum(UserRole),
         nullable=False,
         default=UserRole.USER,
         index=True,
@@ -99,7 +140,7 @@ class User(BaseUserModel, AuditMixin):
 
     # Подписка
     subscription_tier = Column(
-        SQLEnum(SubscriptionTier),
+        StringEnum(SubscriptionTier),
         nullable=False,
         default=SubscriptionTier.FREE,
         index=True,
@@ -109,7 +150,6 @@ class User(BaseUserModel, AuditMixin):
     subscription_expires_at = Column(
         DateTime(timezone=True),
         nullable=True,
-        index=True,
         comment="Дата окончания подписки"
     )
 
@@ -121,6 +161,14 @@ class User(BaseUserModel, AuditMixin):
         comment="Общее количество раскладов"
     )
 
+    favorites_count = Column(
+        Integer,
+        nullable=False,
+        default=0,
+        server_default='0',
+        comment="Количество избранных раскладов (поддерживается триггером)"
+    )
+
     daily_readings_count = Column(
         BigInteger,
         nullable=False,
@@ -137,7 +185,6 @@ class User(BaseUserModel, AuditMixin):
     last_activity_at = Column(
         DateTime(timezone=True),
         nullable=True,
-        index=True,
         comment="Время последней активности"
     )
 
@@ -200,26 +247,57 @@ class User(BaseUserModel, AuditMixin):
 
     referrals = relationship(
         "User",
-        backref="referrer",
+        back_populates="referrer",
         foreign_keys=[referrer_id]
     )
 
+    referrer = relationship(
+        "User",
+        back_populates="referrals",
+        foreign_keys=[referrer_id],
+        remote_side="User.id"
+    )
+
+    # История раскладов запрашивается только явно, с пагинацией
+    tarot_readings = relationship(
+        "TarotReading",
+        back_populates="user",
+        lazy="raise",
+        passive_deletes=True
+    )
+
+    saved_readings = relationship(
+        "SavedReading",
+        back_populates="user",
+        lazy="raise",
+        passive_deletes=True
+    )
+
     # Ограничения
     __table_args__ = (
         CheckConstraint('daily_readings_count >= 0', name='check_daily_readings_positive'),
         CheckConstraint('total_readings >= 0', name='check_total_readings_positive'),
+        CheckConstraint('favorites_count >= 0', name='check_favorites_count_positive'),
+        enum_check_constraint('status', UserStatus, 'ck_user_status'),
+        enum_check_constraint('role', UserRole, 'ck_user_role'),
+        enum_check_constraint('subscription_tier', SubscriptionTier, 'ck_user_subscription_tier'),
         Index('idx_user_activity', 'status', 'last_activity_at'),
         Index('idx_user_subscription', 'subscription_tier', 'subscription_expires_at'),
+        # BRIN вместо btree для монотонно растущего времени активности
+        Index('brin_users_activity', 'last_activity_at', postgresql_using='brin'),
+        # Триграммный индекс для поиска по username (FilterOperator.TRGM)
+        Index(
+            'idx_users_username_trgm', 'username',
+            postgresql_using='gin',
+            postgresql_ops={'username': 'gin_trgm_ops'}
+        ),
     )
 
     @validates('email')
     def validate_email(self, key, email):
         """Валидация email адреса."""
-        if email:
-            import re
-            pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-            if not re.match(pattern, email):
-                raise ValidationError("Некорректный email адрес")
+        if email and not _EMAIL_RE.match(email):
+            raise ValidationError("Некорректный email адрес")
         return email
 
     @validates('username')
@@ -233,7 +311,7 @@ class User(BaseUserModel, AuditMixin):
                 raise ValidationError("Username должен быть от 5 до 32 символов")
         return username
 
-    @hybrid_property
+    @property
     def full_name(self) -> str:
         """Полное имя пользователя."""
         parts = [self.first_name]
@@ -241,7 +319,7 @@ class User(BaseUserModel, AuditMixin):
             parts.append(self.last_name)
         return ' '.join(parts)
 
-    @hybrid_property
+    @property
     def is_premium(self) -> bool:
         """Проверка наличия активной платной подписки."""
         if self.subscription_tier == SubscriptionTier.FREE:
@@ -250,31 +328,33 @@ class User(BaseUserModel, AuditMixin):
             return self.subscription_expires_at > datetime.utcnow()
         return False
 
-    @hybrid_property
+    @property
     def can_use_daily_reading(self) -> bool:
-        """Может ли пользователь делать расклады сегодня."""
-        # Сброс счетчика если новый день
+        """
+        Может ли пользователь делать расклады сегодня.
+
+        Не изменяет состояние: счетчик за прошлые дни считается нулевым.
+        Для сброса счетчика используйте reset_daily_if_needed().
+        """
+        if self.daily_readings_date != date.today():
+            return True
+
+        return self.daily_readings_count < DAILY_READINGS_LIMITS.get(self.subscription_tier, 3)
+
+    def reset_daily_if_needed(self) -> bool:
+        """
+        Сброс дневного счетчика раскладов при наступлении нового дня.
+
+        Returns:
+            True если счетчик был сброшен
+        """
         today = date.today()
-        if self.daily_readings_date != today:
-            self.daily_readings_count = 0
-            self.daily_readings_date = today
-
-        # Проверка лимитов в зависимости от подписки
-        limits = {
-            SubscriptionTier.FREE: 3,
-            SubscriptionTier.BASIC: 10,
-            SubscriptionTier.PREMIUM: 50,
-            SubscriptionTier.VIP: 999999  # Безлимит
-        }
-
-        return self.daily_readings_count < limits.get(self.subscription_tier, 3)
-
-    def increment_readings_count(self) -> None:
-        """Увеличение счетчиков раскладов."""
-        self.total_readings += 1
-        self.daily_readings_count += 1
-        self.last_activity_at = datetime.utcnow()
-        logger.debug(f"Пользователь {self.telegram_id}: расклад #{self.total_readings}")
+        if self.daily_readings_date == today:
+            return False
+
+        self.daily_readings_count = 0
+        self.daily_readings_date = today
+        return True
 
     def block(self, reason: Optional[str] = None) -> None:
         """Блокировка пользователя."""
@@ -357,9 +437,16 @@ class UserBirthData(BaseUserModel):
         comment="Часовой пояс места рождения"
     )
 
+    # Денормализованный знак зодиака (вычисляется при установке birth_date)
+    zodiac_sign = Column(
+        String(16),
+        nullable=True,
+        comment="Знак зодиака по дате рождения"
+    )
+
     # Кэш натальной карты
     natal_chart_cache = Column(
-        JSON,
+        JSONB,
         nullable=True,
         comment="Кэшированная натальная карта"
     )
@@ -390,9 +477,10 @@ class UserBirthData(BaseUserModel):
         if birth_date < min_date:
             raise ValidationError("Дата рождения слишком ранняя")
 
+        self.zodiac_sign = _compute_zodiac(birth_date)
         return birth_date
 
-    @hybrid_property
+    @property
     def age_years(self) -> int:
         """Возраст в годах."""
         today = date.today()
@@ -405,27 +493,6 @@ class UserBirthData(BaseUserModel):
 
         return age
 
-    @hybrid_property
-    def zodiac_sign(self) -> str:
-        """Знак зодиака по дате рождения."""
-        day = self.birth_date.day
-        month = self.birth_date.month
-
-        signs = [
-            (3, 21, "Овен"), (4, 20, "Телец"), (5, 21, "Близнецы"),
-            (6, 21, "Рак"), (7, 23, "Лев"), (8, 23, "Дева"),
-            (9, 23, "Весы"), (10, 23, "Скорпион"), (11, 22, "Стрелец"),
-            (12, 22, "Козерог"), (1, 20, "Водолей"), (2, 19, "Рыбы")
-        ]
-
-        for end_month, end_day, sign in signs:
-            if month == end_month and day < end_day:
-                return sign
-            elif month == end_month - 1 or (month == 12 and end_month == 1):
-                return sign
-
-        return "Неизвестно"
-
     def __repr__(self) -> str:
         return f"<UserBirthData(user_id={self.user_id}, birth_date={self.birth_date})>"
 
@@ -500,7 +567,7 @@ class UserSettings(BaseUserModel):
 
     # Кастомные настройки
     custom_settings = Column(
-        JSON,
+        JSONB,
         nullable=True,
         default=dict,
         comment="Дополнительные настройки в JSON"
@@ -513,7 +580,7 @@ class UserSettings(BaseUserModel):
         return f"<UserSettings(user_id={self.user_id})>"
 
 
-class UserConsent(TimestampMixin):
+class UserConsent(BaseModel, TimestampMixin):
     """
     Согласия пользователя на обработку данных.
 
@@ -581,4 +648,12 @@ class UserConsent(TimestampMixin):
     )
 
     def __repr__(self) -> str:
-        return f"<UserConsent(user_id={self.user_id}, type={self.consent_type}, granted={self.is_granted})>"
\ No newline at end of file
+        return f"<UserConsent(user_id={self.user_id}, type={self.consent_type}, granted={self.is_granted})>"
+
+
+# Расширение pg_trgm нужно триграммному индексу users.username
+event.listen(
+    User.__table__,
+    'before_create',
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect='postgresql')
+)
@@ -8,9 +8,23 @@
 - Вспомогательные функции для работы с БД
 """
 
-from typing import Type, TypeVar, Optional, AsyncContextManager
-from contextlib import asynccontextmanager
-
+import asyncio
+import importlib
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import (
+    TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Sequence, Tuple, Type,
+    TypedDict, TypeVar, Optional, Union
+)
+from contextvars import Context, ContextVar
+from dataclasses import dataclass
+from datetime import datetime
+from types import MappingProxyType
+
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from config import logger
@@ -18,10 +32,11 @@ from core.interfaces.repository import IUnitOfWork, IRepositoryFactory
 from infrastructure.database.connection import db_connection
 from infrastructure.database.repositories.base import BaseRepository
 
-# Импорт конкретных репозиториев
-from infrastructure.database.repositories.user import UserRepository
-from infrastructure.database.repositories.tarot import TarotRepository
-from infrastructure.database.repositories.subscription import SubscriptionRepository
+# Конкретные репозитории импортируются лениво (см. __getattr__ модуля)
+if TYPE_CHECKING:
+    from infrastructure.database.repositories.user import UserRepository
+    from infrastructure.database.repositories.tarot import TarotRepository
+    from infrastructure.database.repositories.subscription import SubscriptionRepository
 
 # Экспорт репозиториев
 __all__ = [
@@ -37,13 +52,104 @@ __all__ = [
     'UnitOfWork',
     'get_unit_of_work',
 
+    # Кэш пользователей
+    'CachedUser',
+    'get_cached_user_snapshot',
+
     # Фабрика
     'RepositoryFactory',
-    'get_repository'
+    'get_repository',
+
+    # Прогрев пула соединений
+    'warmup',
+
+    # Фоновое логирование
+    'flush_uow_logs',
+
+    # Пакетная запись
+    'WriteBatcher',
+    'write_batcher',
+    'batched_create_tarot_reading'
 ]
 
 T = TypeVar('T', bound=BaseRepository)
 
+# Модули конкретных репозиториев по имени класса
+_LAZY_REPOSITORIES: Dict[str, str] = {
+    'UserRepository': 'infrastructure.database.repositories.user',
+    'TarotRepository': 'infrastructure.database.repositories.tarot',
+    'SubscriptionRepository': 'infrastructure.database.repositories.subscription',
+}
+
+
+@lru_cache(maxsize=None)
+def _load_repository_class(class_name: str) -> Type[BaseRepository]:
+    """
+    Импорт класса репозитория при первом обращении.
+
+    Args:
+        class_name: Имя класса из _LAZY_REPOSITORIES
+
+    Returns:
+        Класс репозитория
+    """
+    module = importlib.import_module(_LAZY_REPOSITORIES[class_name])
+    return getattr(module, class_name)
+
+
+def __getattr__(name: str) -> Any:
+    """
+    Ленивый экспорт конкретных репозиториев (PEP 562).
+
+    Позволяет по-прежнему писать
+    from infrastructure.database.repositories import UserRepository.
+    """
+    if name in _LAZY_REPOSITORIES:
+        return _load_repository_class(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _as_repository_class(
+        repository: Union[str, Type[BaseRepository]]
+) -> Type[BaseRepository]:
+    """
+    Приведение записи реестра к классу репозитория.
+
+    Args:
+        repository: Класс или имя лениво импортируемого класса
+
+    Returns:
+        Класс репозитория
+    """
+    if isinstance(repository, str):
+        return _load_repository_class(repository)
+    return repository
+
+# Интернированные ключи репозиториев в UnitOfWork._repositories
+_K_USERS = sys.intern('users')
+_K_TAROT = sys.intern('tarot')
+_K_SUBSCRIPTIONS = sys.intern('subscriptions')
+
+# Сколько раз один и тот же запрос может выполниться в рамках UoW,
+# прежде чем это будет считаться признаком N+1
+N_PLUS_ONE_THRESHOLD = 5
+
+# Очередь предупреждений UoW, которые пишет фоновая задача пачками
+_log_queue: asyncio.Queue = asyncio.Queue(maxsize=1000)
+_log_drainer: Optional[asyncio.Task] = None
+
+# Максимальный размер пачки и время ожидания следующей записи (секунды)
+LOG_BATCH_SIZE = 100
+LOG_BATCH_TIMEOUT = 1.0
+
+
+class RepositorySet(TypedDict, total=False):
+    """Репозитории, созданные в рамках одного Unit of Work."""
+
+    users: 'UserRepository'
+    tarot: 'TarotRepository'
+    subscriptions: 'SubscriptionRepository'
+
 
 class UnitOfWork(IUnitOfWork):
     """
@@ -53,6 +159,21 @@ class UnitOfWork(IUnitOfWork):
     в рамках одной транзакции.
     """
 
+    __slots__ = ('_session', '_repositories', '_query_fingerprints', '_query_samples')
+
+    # Репозитории, доступные как атрибуты (uow.users, uow.tarot, ...)
+    _REPOS: Dict[str, str] = {
+        _K_USERS: 'UserRepository',
+        _K_TAROT: 'TarotRepository',
+        _K_SUBSCRIPTIONS: 'SubscriptionRepository',
+    }
+
+    # Аннотации для статического анализа, свойства-аксессоры
+    # генерируются из _REPOS в _install_repository_accessors
+    users: 'UserRepository'
+    tarot: 'TarotRepository'
+    subscriptions: 'SubscriptionRepository'
+
     def __init__(self, session: AsyncSession):
         """
         Инициализация Unit of Work.
@@ -61,38 +182,34 @@ class UnitOfWork(IUnitOfWork):
             session: Сессия БД
         """
         self._session = session
-        self._repositories = {}
+        self._repositories: RepositorySet = {}
 
-        # Инициализация репозиториев
-        self._users: Optional[UserRepository] = None
-        self._tarot: Optional[TarotRepository] = None
-        self._subscriptions: Optional[SubscriptionRepository] = None
+        # Отпечатки ORM-запросов: счетчик запросов и обнаружение N+1
+        self._query_fingerprints: Counter = Counter()
+        # Первый запрос с каждым отпечатком - для текста в предупреждении
+        self._query_samples: Dict[Any, Any] = {}
+        event.listen(session.sync_session, 'do_orm_execute', self._track_query)
 
         logger.debug("UnitOfWork инициализирован")
 
-    @property
-    def users(self) -> UserRepository:
-        """Репозиторий пользователей."""
-        if self._users is None:
-            self._users = UserRepository(self._session)
-            self._repositories['users'] = self._users
-        return self._users
+    def _create_repository(
+            self,
+            name: str,
+            repo_class: Type[BaseRepository]
+    ) -> BaseRepository:
+        """
+        Создание репозитория при первом обращении.
 
-    @property
-    def tarot(self) -> TarotRepository:
-        """Репозиторий Таро."""
-        if self._tarot is None:
-            self._tarot = TarotRepository(self._session)
-            self._repositories['tarot'] = self._tarot
-        return self._tarot
+        Args:
+            name: Имя репозитория
+            repo_class: Класс репозитория
 
-    @property
-    def subscriptions(self) -> SubscriptionRepository:
-        """Репозиторий подписок."""
-        if self._subscriptions is None:
-            self._subscriptions = SubscriptionRepository(self._session)
-            self._repositories['subscriptions'] = self._subscriptions
-        return self._subscriptions
+        Returns:
+            Репозиторий, привязанный к сессии Unit of Work
+        """
+        repository = repo_class(self._session)
+        self._repositories[name] = repository
+        return repository
 
     async def commit(self) -> None:
         """
@@ -110,18 +227,89 @@ class UnitOfWork(IUnitOfWork):
             raise
 
     async def rollback(self) -> None:
-        """Откат транзакции."""
+        """
+        Откат транзакции.
+
+        Raises:
+            Exception: Ошибка отката пробрасывается дальше после логирования
+        """
         try:
             await self._session.rollback()
             logger.debug("Транзакция откачена")
         except Exception as e:
             logger.error(f"Ошибка отката транзакции: {e}")
+            raise
 
     async def close(self) -> None:
         """Закрытие сессии."""
+        self._stop_query_tracking()
         await self._session.close()
         logger.debug("Сессия закрыта")
 
+    def _track_query(self, orm_execute_state) -> None:
+        """
+        Учет выполненного ORM-запроса.
+
+        Отпечатком служит ключ кэша компиляции SQLAlchemy: он не зависит
+        от значений параметров и строится без компиляции запроса в SQL.
+        Текст SQL получается только при выводе предупреждения.
+
+        Args:
+            orm_execute_state: Состояние выполнения из события do_orm_execute
+        """
+        statement = orm_execute_state.statement
+        cache_key = statement._generate_cache_key()
+        # Некэшируемые конструкции не дают ключа - учитываем их по объекту
+        fingerprint = cache_key.key if cache_key is not None else id(statement)
+
+        self._query_fingerprints[fingerprint] += 1
+        self._query_samples.setdefault(fingerprint, statement)
+
+    def _stop_query_tracking(self) -> None:
+        """Отключение учета запросов."""
+        if event.contains(self._session.sync_session, 'do_orm_execute', self._track_query):
+            event.remove(self._session.sync_session, 'do_orm_execute', self._track_query)
+
+    def report_repeated_queries(self) -> None:
+        """Предупреждение о запросах, повторявшихся подозрительно часто (N+1)."""
+        for fingerprint, count in self._query_fingerprints.items():
+            if count >= N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    "Возможный N+1: запрос выполнен %d раз в UoW: %.200s",
+                    count, self._query_samples[fingerprint]
+                )
+
+    async def increment_and_create_reading(
+            self,
+            user_id: int,
+            spread_code: str,
+            question: Optional[str] = None
+    ):
+        """
+        Списание дневного лимита и создание расклада в одной транзакции.
+
+        Выполняется за два запроса: один SELECT загружает пользователя,
+        расклад и колоду, затем один запрос с CTE списывает лимит
+        (UPDATE users ... RETURNING), увеличивает счетчик расклада и
+        вставляет расклад (см. TarotRepository.create_reading_with_limit).
+
+        Args:
+            user_id: ID пользователя
+            spread_code: Код расклада
+            question: Вопрос
+
+        Returns:
+            Созданный расклад
+
+        Raises:
+            DailyLimitReachedError: При превышении дневного лимита
+        """
+        return await self.tarot.create_reading_with_limit(
+            user_id=user_id,
+            spread_code=spread_code,
+            question=question
+        )
+
     def get_repository(self, name: str) -> Optional[BaseRepository]:
         """
         Получение репозитория по имени.
@@ -135,18 +323,18 @@ class UnitOfWork(IUnitOfWork):
         return self._repositories.get(name)
 
     def reset_query_counts(self) -> None:
-        """Сброс счетчиков запросов во всех репозиториях."""
-        for repo in self._repositories.values():
-            if hasattr(repo, 'reset_query_count'):
-                repo.reset_query_count()
+        """Сброс счетчиков запросов."""
+        self._query_fingerprints.clear()
+        self._query_samples.clear()
 
     def get_total_query_count(self) -> int:
-        """Получение общего количества запросов."""
-        total = 0
-        for repo in self._repositories.values():
-            if hasattr(repo, 'query_count'):
-                total += repo.query_count
-        return total
+        """
+        Получение общего количества запросов.
+
+        Считаются все ORM-запросы сессии (событие do_orm_execute),
+        а не только вызовы отдельных методов репозиториев.
+        """
+        return sum(self._query_fingerprints.values())
 
     async def __aenter__(self):
         """Вход в контекстный менеджер."""
@@ -156,22 +344,236 @@ class UnitOfWork(IUnitOfWork):
         """
         Выход из контекстного менеджера.
 
-        При исключении автоматически откатывает транзакцию.
+        При исключении автоматически откатывает транзакцию. Сессия
+        закрывается в любом случае, даже если commit или rollback упали.
         """
-        if exc_type:
-            await self.rollback()
+        try:
+            if exc_type:
+                await self.rollback()
+            else:
+                await self.commit()
+            self.report_repeated_queries()
+        finally:
+            await self.close()
+
+
+def _make_repository_accessor(name: str, class_name: str) -> property:
+    """
+    Создание свойства-аксессора для репозитория с фиксированным именем.
+
+    Имя замыкается в функции, поэтому обращение к уже созданному
+    репозиторию - это один поиск в словаре. Модуль репозитория
+    импортируется при первом создании репозитория.
+
+    Args:
+        name: Имя репозитория
+        class_name: Имя класса репозитория
+
+    Returns:
+        Свойство для класса UnitOfWork
+    """
+    def accessor(self: UnitOfWork) -> BaseRepository:
+        try:
+            return self._repositories[name]
+        except KeyError:
+            return self._create_repository(name, _load_repository_class(class_name))
+
+    accessor.__name__ = name
+    accessor.__doc__ = f"Репозиторий {class_name}."
+    return property(accessor)
+
+
+def _install_repository_accessors(uow_class: Type[UnitOfWork]) -> None:
+    """
+    Установка свойств-аксессоров для всех репозиториев из _REPOS.
+
+    Args:
+        uow_class: Класс Unit of Work
+    """
+    for name, class_name in uow_class._REPOS.items():
+        setattr(uow_class, name, _make_repository_accessor(name, class_name))
+
+
+_install_repository_accessors(UnitOfWork)
+
+
+def _enqueue_uow_warning(kind: str, value: int) -> None:
+    """
+    Передача предупреждения UoW фоновой задаче логирования.
+
+    Args:
+        kind: Тип предупреждения
+        value: Значение метрики
+    """
+    global _log_drainer
+
+    if _log_drainer is None or _log_drainer.done():
+        _log_drainer = asyncio.create_task(_drain_log_queue())
+
+    try:
+        _log_queue.put_nowait((kind, value))
+    except asyncio.QueueFull:
+        # Очередь переполнена - пишем напрямую, чтобы не потерять сигнал
+        _flush_log_batch([(kind, value)])
+
+
+def _flush_log_batch(batch: List[tuple]) -> None:
+    """
+    Запись накопленных предупреждений одной строкой лога.
+
+    Args:
+        batch: Список пар (тип, значение)
+    """
+    summary: Dict[str, List[int]] = defaultdict(list)
+    for kind, value in batch:
+        summary[kind].append(value)
+
+    for kind, values in summary.items():
+        if kind == "uow_large":
+            logger.warning(
+                "Большое количество запросов в UoW: %d случаев, максимум %d",
+                len(values), max(values)
+            )
         else:
-            await self.commit()
-        await self.close()
+            logger.warning("%s: %d случаев, максимум %d", kind, len(values), max(values))
+
+
+async def _drain_log_queue() -> None:
+    """Фоновая задача: собирает предупреждения из очереди и пишет их пачками."""
+    while True:
+        batch = [await _log_queue.get()]
+        while len(batch) < LOG_BATCH_SIZE:
+            try:
+                batch.append(await asyncio.wait_for(_log_queue.get(), LOG_BATCH_TIMEOUT))
+            except asyncio.TimeoutError:
+                break
+        _flush_log_batch(batch)
+
+
+async def flush_uow_logs() -> None:
+    """
+    Остановка фоновой задачи логирования и запись оставшихся предупреждений.
+
+    Вызывается при завершении работы приложения.
+    """
+    global _log_drainer
+
+    if _log_drainer is not None:
+        _log_drainer.cancel()
+        try:
+            await _log_drainer
+        except asyncio.CancelledError:
+            pass
+        _log_drainer = None
+
+    batch = []
+    while not _log_queue.empty():
+        batch.append(_log_queue.get_nowait())
+    if batch:
+        _flush_log_batch(batch)
 
 
-@asynccontextmanager
-async def get_unit_of_work() -> AsyncContextManager[UnitOfWork]:
+# Unit of Work, открытый в текущем контексте выполнения
+_current_uow: ContextVar[Optional[UnitOfWork]] = ContextVar('_current_uow', default=None)
+
+
+class _UnitOfWorkContext:
+    """
+    Контекстный менеджер, владеющий сессией и Unit of Work.
+
+    Написан вручную вместо @asynccontextmanager, чтобы не создавать
+    генератор и его обертку на каждый вход.
+    """
+
+    __slots__ = ('_session_ctx', '_token', '_savepoint', 'uow')
+
+    def __init__(self):
+        """Инициализация контекста."""
+        self._session_ctx = None
+        self._token = None
+        self._savepoint = None
+        self.uow: Optional[UnitOfWork] = None
+
+    async def __aenter__(self) -> UnitOfWork:
+        """
+        Вход в контекст.
+
+        Returns:
+            Внешний Unit of Work, если он уже открыт, иначе новый
+        """
+        current = _current_uow.get()
+        if current is not None:
+            # Вложенный вход работает в точке сохранения внешней транзакции
+            self._savepoint = await current._session.begin_nested()
+            self.uow = current
+            return current
+
+        self._session_ctx = db_connection.get_session()
+        session = await self._session_ctx.__aenter__()
+        self.uow = UnitOfWork(session)
+        self._token = _current_uow.set(self.uow)
+        return self.uow
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb) -> bool:
+        """
+        Выход из контекста: commit или rollback и возврат сессии.
+
+        Вложенный контекст освобождает свою точку сохранения, а при
+        исключении откатывается к ней: частичные изменения не попадают
+        в commit внешнего контекста, а транзакция остается рабочей.
+        """
+        session_ctx = self._session_ctx
+        if session_ctx is None:
+            savepoint = self._savepoint
+            if savepoint is not None and savepoint.is_active:
+                if exc_type is None:
+                    await savepoint.commit()
+                else:
+                    await savepoint.rollback()
+            return False
+
+        uow = self.uow
+        _current_uow.reset(self._token)
+        try:
+            if exc_type is None:
+                await uow.commit()
+            else:
+                await uow.rollback()
+        except BaseException as error:
+            self._finish(uow)
+            await session_ctx.__aexit__(type(error), error, error.__traceback__)
+            raise
+
+        self._finish(uow)
+        await session_ctx.__aexit__(exc_type, exc_val, exc_tb)
+        return False
+
+    @staticmethod
+    def _finish(uow: UnitOfWork) -> None:
+        """
+        Логирование статистики и освобождение ресурсов Unit of Work.
+
+        Args:
+            uow: Завершаемый Unit of Work
+        """
+        query_count = uow.get_total_query_count()
+        if query_count > 10:
+            _enqueue_uow_warning("uow_large", query_count)
+        uow.report_repeated_queries()
+        uow._stop_query_tracking()
+
+
+def get_unit_of_work() -> _UnitOfWorkContext:
     """
     Получение Unit of Work в виде контекстного менеджера.
 
-    Yields:
-        UnitOfWork для работы с репозиториями
+    Вложенный вызов внутри уже открытого Unit of Work возвращает внешний
+    UoW: отдельная сессия не открывается, commit и rollback выполняет
+    внешний контекст. Вложенный блок выполняется в точке сохранения
+    (SAVEPOINT) и при исключении откатывается только он.
+
+    Returns:
+        Контекстный менеджер, отдающий UnitOfWork
 
     Example:
         async with get_unit_of_work() as uow:
@@ -179,19 +581,7 @@ async def get_unit_of_work() -> AsyncContextManager[UnitOfWork]:
             await uow.users.update(user.id, last_activity_at=datetime.utcnow())
             # Автоматический commit при выходе
     """
-    async with db_connection.get_session() as session:
-        uow = UnitOfWork(session)
-        try:
-            yield uow
-            await uow.commit()
-        except Exception:
-            await uow.rollback()
-            raise
-        finally:
-            # Логирование статистики
-            query_count = uow.get_total_query_count()
-            if query_count > 10:
-                logger.warning(f"Большое количество запросов в UoW: {query_count}")
+    return _UnitOfWorkContext()
 
 
 class RepositoryFactory(IRepositoryFactory):
@@ -201,14 +591,19 @@ class RepositoryFactory(IRepositoryFactory):
     Позволяет создавать репозитории динамически по типу.
     """
 
-    # Маппинг типов на классы репозиториев
-    _repository_map = {
-        'user': UserRepository,
-        'users': UserRepository,
-        'tarot': TarotRepository,
-        'subscription': SubscriptionRepository,
-        'subscriptions': SubscriptionRepository,
+    __slots__ = ('_session', '_cache')
+
+    # Маппинг типов на классы репозиториев. Снаружи доступен только
+    # неизменяемый снимок, регистрация подменяет его целиком
+    _backing: Dict[str, Union[str, Type[BaseRepository]]] = {
+        'user': 'UserRepository',
+        'users': 'UserRepository',
+        'tarot': 'TarotRepository',
+        'subscription': 'SubscriptionRepository',
+        'subscriptions': 'SubscriptionRepository',
     }
+    _repository_map = MappingProxyType(_backing)
+    _register_lock = threading.Lock()
 
     def __init__(self, session: AsyncSession):
         """
@@ -238,7 +633,7 @@ class RepositoryFactory(IRepositoryFactory):
             return self._cache[repository_type]
 
         # Получаем класс репозитория
-        repo_class = self._repository_map.get(repository_type.lower())
+        repo_class = _resolve_repository_class(repository_type)
         if not repo_class:
             logger.error(f"Неизвестный тип репозитория: {repository_type}")
             return None
@@ -247,7 +642,7 @@ class RepositoryFactory(IRepositoryFactory):
         repository = repo_class(self._session)
         self._cache[repository_type] = repository
 
-        logger.debug(f"Создан репозиторий типа {repository_type}")
+        logger.debug("Создан репозиторий типа %s", repository_type)
         return repository
 
     def get_repository_class(
@@ -263,7 +658,7 @@ class RepositoryFactory(IRepositoryFactory):
         Returns:
             Класс репозитория или None
         """
-        return self._repository_map.get(repository_type.lower())
+        return _resolve_repository_class(repository_type)
 
     @classmethod
     def register_repository(
@@ -278,10 +673,43 @@ class RepositoryFactory(IRepositoryFactory):
             repository_type: Тип репозитория
             repository_class: Класс репозитория
         """
-        cls._repository_map[repository_type.lower()] = repository_class
+        global _REPO_DISPATCH
+
+        key = sys.intern(repository_type.lower())
+        with cls._register_lock:
+            backing = {**cls._backing, key: repository_class}
+            cls._backing = backing
+            cls._repository_map = MappingProxyType(backing)
+            _REPO_DISPATCH = {**_REPO_DISPATCH, key: repository_class}
         logger.info(f"Зарегистрирован репозиторий {repository_type}")
 
 
+# Таблица диспетчеризации с ключами в нижнем регистре (интернированными),
+# чтобы для типовых запросов не вызывать .lower() на каждый вызов
+_REPO_DISPATCH: Dict[str, Union[str, Type[BaseRepository]]] = {
+    sys.intern(key): repo_class
+    for key, repo_class in RepositoryFactory._repository_map.items()
+}
+
+
+def _resolve_repository_class(repository_type: str) -> Optional[Type[BaseRepository]]:
+    """
+    Получение класса репозитория по типу.
+
+    Args:
+        repository_type: Тип репозитория в любом регистре
+
+    Returns:
+        Класс репозитория или None
+    """
+    repo_class = _REPO_DISPATCH.get(repository_type)
+    if repo_class is None:
+        repo_class = _REPO_DISPATCH.get(repository_type.lower())
+        if repo_class is None:
+            return None
+    return _as_repository_class(repo_class)
+
+
 async def get_repository(
         repository_type: str,
         session: Optional[AsyncSession] = None
@@ -289,6 +717,9 @@ async def get_repository(
     """
     Быстрое получение репозитория.
 
+    Класс репозитория берется напрямую из таблицы диспетчеризации,
+    без создания экземпляра фабрики на каждый вызов.
+
     Args:
         repository_type: Тип репозитория
         session: Сессия БД (создается если не указана)
@@ -299,35 +730,297 @@ async def get_repository(
     Raises:
         ValueError: Если тип репозитория неизвестен
     """
+    repo_class = _resolve_repository_class(repository_type)
+    if not repo_class:
+        raise ValueError(f"Неизвестный тип репозитория: {repository_type}")
+
     if session is None:
         async with db_connection.get_session() as session:
-            factory = RepositoryFactory(session)
-            repo = factory.create_repository(repository_type)
-            if not repo:
-                raise ValueError(f"Неизвестный тип репозитория: {repository_type}")
-            return repo
-    else:
-        factory = RepositoryFactory(session)
-        repo = factory.create_repository(repository_type)
-        if not repo:
-            raise ValueError(f"Неизвестный тип репозитория: {repository_type}")
-        return repo
+            return repo_class(session)
+
+    return repo_class(session)
+
+
+# Прогрев пула соединений
+
+async def _prime_connection() -> None:
+    """Получение соединения из пула и возврат его обратно."""
+    async with db_connection.get_session() as session:
+        await session.execute(text("SELECT 1"))
+
+
+async def warmup(n: int = 5) -> None:
+    """
+    Прогрев пула соединений при старте приложения.
+
+    Открывает n соединений параллельно, чтобы первые запросы пользователей
+    не тратили время на установку соединения с PostgreSQL. Живыми
+    соединения держат pool_pre_ping и pool_recycle, заданные в
+    DatabaseConnection.
+
+    Args:
+        n: Количество соединений для прогрева
+    """
+    engine = db_connection.engine
+    if engine is None:
+        logger.warning("Прогрев пула пропущен: подключение к БД не установлено")
+        return
+
+    if __debug__ and not getattr(engine.sync_engine.pool, '_pre_ping', False):
+        logger.warning("Пул соединений создан без pool_pre_ping")
+
+    await asyncio.gather(*(_prime_connection() for _ in range(n)))
+    logger.info(f"Пул соединений прогрет: {n} соединений")
+
+
+# Размер пачки ID для пакетных выборок
+TELEGRAM_IDS_CHUNK_SIZE = 1000
+
+@dataclass(frozen=True)
+class CachedUser:
+    """
+    Неизменяемый снимок пользователя для кэша get_cached_user_snapshot.
+
+    Содержит только идентификаторы и поля, нужные для проверок доступа.
+    В отличие от ORM-объекта, не привязан к сессии и безопасно
+    разделяется между обработчиками.
+    """
+
+    id: int
+    telegram_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    language_code: Optional[str]
+    status: Any
+    role: Any
+    subscription_tier: Any
+    subscription_expires_at: Optional[datetime]
+
+    @classmethod
+    def from_user(cls, user: Any) -> 'CachedUser':
+        """
+        Снимок ORM-объекта пользователя.
+
+        Args:
+            user: Пользователь
+
+        Returns:
+            Снимок пользователя
+        """
+        return cls(
+            id=user.id,
+            telegram_id=user.telegram_id,
+            username=user.username,
+            first_name=user.first_name,
+            language_code=user.language_code,
+            status=user.status,
+            role=user.role,
+            subscription_tier=user.subscription_tier,
+            subscription_expires_at=user.subscription_expires_at
+        )
+
+
+# Кэш пользователей по Telegram ID: telegram_id -> (снимок, время истечения)
+USER_CACHE_TTL = 60
+USER_CACHE_MAX_SIZE = 10000
+_user_cache: Dict[int, Tuple[CachedUser, float]] = {}
+
+# Обратный индекс кэша: ID пользователя -> Telegram ID
+_user_cache_ids: Dict[int, int] = {}
+
+
+def _get_cached_user(telegram_id: int) -> Optional[CachedUser]:
+    """
+    Получение пользователя из кэша.
+
+    Args:
+        telegram_id: ID в Telegram
+
+    Returns:
+        Снимок пользователя или None, если записи нет или она истекла
+    """
+    entry = _user_cache.get(telegram_id)
+    if entry is None:
+        return None
+
+    user, expires_at = entry
+    if expires_at > time.monotonic():
+        return user
+
+    invalidate_cached_user(telegram_id)
+    return None
+
+
+def _cache_user(user: CachedUser) -> None:
+    """
+    Сохранение снимка пользователя в кэш.
+
+    Args:
+        user: Снимок пользователя
+    """
+    now = time.monotonic()
+    _user_cache[user.telegram_id] = (user, now + USER_CACHE_TTL)
+    _user_cache_ids[user.id] = user.telegram_id
+
+    # Ограничиваем размер кэша
+    if len(_user_cache) > USER_CACHE_MAX_SIZE:
+        for key in [k for k, (_, expires_at) in _user_cache.items() if expires_at <= now]:
+            invalidate_cached_user(key)
+
+        # Если все еще много, удаляем самые старые
+        if len(_user_cache) > USER_CACHE_MAX_SIZE:
+            oldest = sorted(_user_cache.items(), key=lambda item: item[1][1])
+            for key, _ in oldest[:len(_user_cache) - USER_CACHE_MAX_SIZE * 4 // 5]:
+                invalidate_cached_user(key)
+
+
+def invalidate_cached_user(telegram_id: int) -> None:
+    """
+    Удаление пользователя из кэша после изменения.
+
+    Args:
+        telegram_id: ID в Telegram
+    """
+    entry = _user_cache.pop(telegram_id, None)
+    if entry is not None:
+        _user_cache_ids.pop(entry[0].id, None)
+
+
+def invalidate_cached_user_by_id(user_id: int) -> None:
+    """
+    Удаление пользователя из кэша по ID пользователя.
+
+    Для путей записи, которые знают только users.id (например, изменение
+    подписки).
+
+    Args:
+        user_id: ID пользователя
+    """
+    telegram_id = _user_cache_ids.get(user_id)
+    if telegram_id is not None:
+        invalidate_cached_user(telegram_id)
 
 
 # Вспомогательные функции для частых операций
+#
+# Каждая функция принимает необязательный uow. Без него открывается
+# отдельная транзакция; если нужно выполнить несколько операций подряд,
+# откройте один get_unit_of_work() и передайте его во все вызовы:
+#
+#     async with get_unit_of_work() as uow:
+#         user, _ = await create_or_update_user_from_telegram(..., uow=uow)
+#         await create_tarot_reading(user.id, "three_cards", uow=uow)
+
+async def _run_in_uow(
+        operation: Callable[[UnitOfWork], Awaitable[Any]],
+        uow: Optional[UnitOfWork] = None
+) -> Any:
+    """
+    Выполнение операции в переданном или новом Unit of Work.
 
-async def get_user_by_telegram_id(telegram_id: int):
+    Args:
+        operation: Функция, принимающая UnitOfWork и возвращающая корутину
+        uow: Существующий Unit of Work (commit выполняет владелец)
+
+    Returns:
+        Результат операции
+    """
+    if uow is not None:
+        return await operation(uow)
+
+    async with get_unit_of_work() as own_uow:
+        return await operation(own_uow)
+
+
+async def get_user_by_telegram_id(
+        telegram_id: int,
+        *,
+        uow: Optional[UnitOfWork] = None
+):
     """
     Быстрое получение пользователя по Telegram ID.
 
+    Всегда читает пользователя из БД и возвращает ORM-объект. Для
+    проверок, которым нужно только чтение, используйте
+    get_cached_user_snapshot.
+
     Args:
         telegram_id: ID в Telegram
+        uow: Unit of Work для повторного использования
 
     Returns:
         Пользователь или None
     """
-    async with get_unit_of_work() as uow:
-        return await uow.users.get_by_telegram_id(telegram_id)
+    return await _run_in_uow(
+        lambda u: u.users.get_by_telegram_id(telegram_id),
+        uow
+    )
+
+
+async def get_cached_user_snapshot(
+        telegram_id: int,
+        *,
+        uow: Optional[UnitOfWork] = None
+) -> Optional[CachedUser]:
+    """
+    Получение неизменяемого снимка пользователя через кэш.
+
+    Снимок кэшируется на USER_CACHE_TTL секунд и сбрасывается при
+    изменении пользователя и его подписки. Внутри открытого Unit of Work
+    снимок может отражать незафиксированные изменения, поэтому в кэш он
+    не попадает.
+
+    Args:
+        telegram_id: ID в Telegram
+        uow: Unit of Work для повторного использования
+
+    Returns:
+        Снимок пользователя или None
+    """
+    standalone = uow is None and _current_uow.get() is None
+    if standalone:
+        cached = _get_cached_user(telegram_id)
+        if cached is not None:
+            return cached
+
+    async def fetch(u: UnitOfWork) -> Optional[CachedUser]:
+        user = await u.users.get_by_telegram_id(telegram_id)
+        # Снимок снимается до commit: после него атрибуты истекают
+        return CachedUser.from_user(user) if user is not None else None
+
+    snapshot = await _run_in_uow(fetch, uow)
+
+    if standalone and snapshot is not None:
+        _cache_user(snapshot)
+    return snapshot
+
+
+async def get_users_by_telegram_ids(
+        telegram_ids: Sequence[int],
+        *,
+        uow: Optional[UnitOfWork] = None
+) -> Dict[int, Any]:
+    """
+    Быстрое получение нескольких пользователей по Telegram ID.
+
+    ID разбиваются на пачки по TELEGRAM_IDS_CHUNK_SIZE, чтобы не упираться
+    в лимит параметров запроса PostgreSQL.
+
+    Args:
+        telegram_ids: ID в Telegram
+        uow: Unit of Work для повторного использования
+
+    Returns:
+        Словарь telegram_id -> пользователь
+    """
+    async def fetch(u: UnitOfWork) -> Dict[int, Any]:
+        users: Dict[int, Any] = {}
+        for start in range(0, len(telegram_ids), TELEGRAM_IDS_CHUNK_SIZE):
+            chunk = telegram_ids[start:start + TELEGRAM_IDS_CHUNK_SIZE]
+            users.update(await u.users.get_users_by_telegram_ids(chunk))
+        return users
+
+    return await _run_in_uow(fetch, uow)
 
 
 async def create_or_update_user_from_telegram(
@@ -335,7 +1028,9 @@ async def create_or_update_user_from_telegram(
         first_name: str,
         last_name: Optional[str] = None,
         username: Optional[str] = None,
-        language_code: str = "ru"
+        language_code: str = "ru",
+        *,
+        uow: Optional[UnitOfWork] = None
 ):
     """
     Быстрое создание/обновление пользователя.
@@ -346,24 +1041,30 @@ async def create_or_update_user_from_telegram(
         last_name: Фамилия
         username: Username
         language_code: Язык
+        uow: Unit of Work для повторного использования
 
     Returns:
         Кортеж (пользователь, создан_новый)
     """
-    async with get_unit_of_work() as uow:
-        return await uow.users.create_or_update_from_telegram(
+    invalidate_cached_user(telegram_id)
+    return await _run_in_uow(
+        lambda u: u.users.create_or_update_from_telegram(
             telegram_id=telegram_id,
             first_name=first_name,
             last_name=last_name,
             username=username,
             language_code=language_code
-        )
+        ),
+        uow
+    )
 
 
 async def create_tarot_reading(
         user_id: int,
         spread_code: str,
-        question: Optional[str] = None
+        question: Optional[str] = None,
+        *,
+        uow: Optional[UnitOfWork] = None
 ):
     """
     Быстрое создание расклада Таро.
@@ -372,49 +1073,282 @@ async def create_tarot_reading(
         user_id: ID пользователя
         spread_code: Код расклада
         question: Вопрос
+        uow: Unit of Work для повторного использования
 
     Returns:
         Созданный расклад
     """
-    async with get_unit_of_work() as uow:
-        # Проверяем лимиты пользователя
-        await uow.users.increment_reading_count(user_id)
-
-        # Создаем расклад
-        reading = await uow.tarot.create_reading(
+    return await _run_in_uow(
+        lambda u: u.increment_and_create_reading(
             user_id=user_id,
             spread_code=spread_code,
             question=question
-        )
+        ),
+        uow
+    )
+
+
+# Пакетная запись
+
+# Маркер остановки в очереди WriteBatcher
+_STOP_BATCHER = object()
+
+
+def _cancel_pending(batch: List[tuple]) -> None:
+    """
+    Отмена еще не завершенных операций пачки.
+
+    Args:
+        batch: Операции (user_id, spread_code, question, future)
+    """
+    for _, _, _, future in batch:
+        if not future.done():
+            future.cancel()
+
+
+class WriteBatcher:
+    """
+    Объединение создания раскладов в общие транзакции.
+
+    Операции, пришедшие в течение flush_interval секунд (но не больше
+    max_batch), выполняются в одном Unit of Work с одним COMMIT. Каждая
+    операция идет в своей точке сохранения, поэтому ошибка одной (например,
+    превышение лимита) не откатывает остальные.
+
+    По умолчанию выключен: включается вызовом start().
+    """
+
+    def __init__(self, flush_interval: float = 0.005, max_batch: int = 100):
+        """
+        Инициализация батчера.
+
+        Args:
+            flush_interval: Максимальное ожидание следующей операции (секунды)
+            max_batch: Максимальное количество операций в транзакции
+        """
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        """Запущен ли фоновый обработчик."""
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Запуск фонового обработчика."""
+        if not self.enabled:
+            # Чистый контекст: обработчик не должен унаследовать открытый UoW
+            self._task = asyncio.create_task(self._run(), context=Context())
+            logger.info("Пакетная запись раскладов включена")
+
+    async def stop(self) -> None:
+        """
+        Остановка обработчика с выполнением операций из очереди.
+
+        Задача не отменяется: в очередь кладется маркер остановки, и
+        обработчик сам дописывает текущую пачку. Операции, поставленные
+        после маркера, выполняются здесь же.
+        """
+        if self._task is None:
+            return
+
+        self._queue.put_nowait(_STOP_BATCHER)
+        await self._task
+        self._task = None
+
+        batch = []
+        while not self._queue.empty():
+            item = self._queue.get_nowait()
+            if item is not _STOP_BATCHER:
+                batch.append(item)
+        if batch:
+            await self._flush(batch)
+
+    async def create_tarot_reading(
+            self,
+            user_id: int,
+            spread_code: str,
+            question: Optional[str] = None
+    ):
+        """
+        Постановка создания расклада в очередь и ожидание commit.
+
+        Args:
+            user_id: ID пользователя
+            spread_code: Код расклада
+            question: Вопрос
 
-        return reading
+        Returns:
+            Созданный расклад
+        """
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((user_id, spread_code, question, future))
+        return await future
+
+    async def _run(self) -> None:
+        """
+        Фоновый цикл: собирает операции в пачки и выполняет их.
+
+        Завершается, получив маркер остановки. Если задачу все же
+        отменили снаружи, ожидающие операции собранной пачки отменяются,
+        чтобы вызывающие не зависли.
+        """
+        batch: List[tuple] = []
+        try:
+            while True:
+                item = await self._queue.get()
+                if item is _STOP_BATCHER:
+                    return
+
+                batch = [item]
+                stopping = False
+                while len(batch) < self.max_batch:
+                    try:
+                        item = await asyncio.wait_for(
+                            self._queue.get(), self.flush_interval
+                        )
+                    except asyncio.TimeoutError:
+                        break
+                    if item is _STOP_BATCHER:
+                        stopping = True
+                        break
+                    batch.append(item)
+
+                await self._flush(batch)
+                batch = []
+                if stopping:
+                    return
+        except BaseException:
+            _cancel_pending(batch)
+            raise
+
+    async def _flush(self, batch: List[tuple]) -> None:
+        """
+        Выполнение пачки операций в одной транзакции.
+
+        Args:
+            batch: Операции (user_id, spread_code, question, future)
+        """
+        results = []
+        try:
+            async with get_unit_of_work() as uow:
+                for user_id, spread_code, question, future in batch:
+                    try:
+                        async with uow._session.begin_nested():
+                            reading = await uow.increment_and_create_reading(
+                                user_id=user_id,
+                                spread_code=spread_code,
+                                question=question
+                            )
+                        results.append((future, reading, None))
+                    except Exception as e:
+                        results.append((future, None, e))
+        except Exception as e:
+            logger.error(f"Ошибка пакетной записи раскладов: {e}")
+            for _, _, _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        except BaseException:
+            # Отмена не наследуется от Exception: не оставляем вызывающих
+            # ждать результат, который уже не будет получен
+            _cancel_pending(batch)
+            raise
+
+        for future, reading, error in results:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(reading)
+
+        logger.debug("Пачка раскладов записана: %d", len(batch))
+
+
+# Общий батчер приложения
+write_batcher = WriteBatcher()
+
+
+async def batched_create_tarot_reading(
+        user_id: int,
+        spread_code: str,
+        question: Optional[str] = None
+):
+    """
+    Создание расклада через общий батчер.
+
+    Если батчер не запущен или вызов идет внутри открытого Unit of Work,
+    расклад создается сразу, как в create_tarot_reading.
+
+    Args:
+        user_id: ID пользователя
+        spread_code: Код расклада
+        question: Вопрос
+
+    Returns:
+        Созданный расклад
+    """
+    if not write_batcher.enabled or _current_uow.get() is not None:
+        return await create_tarot_reading(user_id, spread_code, question)
+
+    return await write_batcher.create_tarot_reading(user_id, spread_code, question)
 
 
 # Статистика и мониторинг
 
-async def get_database_statistics():
+async def get_database_statistics(*, uow: Optional[UnitOfWork] = None):
     """
     Получение общей статистики по БД.
 
+    Без uow независимые запросы выполняются параллельно, каждый в своей
+    сессии. С переданным (или уже открытым в контексте) uow запросы идут
+    последовательно, так как AsyncSession не допускает параллельных запросов.
+
+    Args:
+        uow: Unit of Work для повторного использования
+
     Returns:
         Словарь со статистикой
     """
-    async with get_unit_of_work() as uow:
-        stats = {
-            "users": {
-                "total": await uow.users.count(),
-                "active": await uow.users.get_active_users_count(30),
-                "subscriptions": await uow.users.get_subscription_statistics()
-            },
-            "tarot": {
-                "total_readings": await uow.tarot.count(),
-                "popular_spreads": await uow.tarot.get_popular_spreads()
-            },
-            "revenue": await uow.subscriptions.get_revenue_statistics()
-        }
-
-        return stats
-
-
-# Инициализация при импорте
-logger.info("Репозитории инициализированы")
\ No newline at end of file
+    queries = (
+        lambda u: u.users.count(),
+        lambda u: u.users.get_active_users_count(30),
+        lambda u: u.users.get_subscription_statistics(),
+        lambda u: u.tarot.count(),
+        lambda u: u.tarot.get_popular_spreads(),
+        lambda u: u.subscriptions.get_revenue_statistics(),
+    )
+
+    # Внутри открытого UoW задачи gather унаследовали бы его через
+    # contextvars и выполняли запросы в одной сессии параллельно
+    uow = uow or _current_uow.get()
+
+    if uow is not None:
+        results = [await query(uow) for query in queries]
+    else:
+        results = await asyncio.gather(*(_run_in_uow(query) for query in queries))
+
+    (
+        users_total,
+        users_active,
+        users_subscriptions,
+        tarot_total,
+        popular_spreads,
+        revenue
+    ) = results
+
+    return {
+        "users": {
+            "total": users_total,
+            "active": users_active,
+            "subscriptions": users_subscriptions
+        },
+        "tarot": {
+            "total_readings": tarot_total,
+            "popular_spreads": popular_spreads
+        },
+        "revenue": revenue
+    }
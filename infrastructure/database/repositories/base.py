@@ -11,16 +11,22 @@
 
 from typing import (
     TypeVar, Generic, Optional, List, Dict, Any, Type,
-    Union, Tuple, Callable
+    Union, Tuple, Callable, AsyncIterator, Awaitable, Set
 )
 from abc import ABC, abstractmethod
+from collections import OrderedDict
 from datetime import datetime
+import asyncio
 import json
+import time
 from contextlib import asynccontextmanager
 
-from sqlalchemy import select, update, delete, func, and_, or_, text
+from sqlalchemy import (
+    select, insert, update, delete, func, and_, or_, text, literal, Column,
+    event, tuple_, inspect as sa_inspect
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload, contains_eager
+from sqlalchemy.orm import Session, selectinload, joinedload, contains_eager
 from sqlalchemy.sql import Select
 from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
@@ -37,6 +43,109 @@ from infrastructure.database.models.base import BaseModel
 # Type variable для обобщенных типов
 T = TypeVar('T', bound=BaseModel)
 
+# Лимит параметров в одном запросе для asyncpg/PostgreSQL
+MAX_BIND_PARAMS = 32767
+
+# Максимальный размер пачки при массовой вставке
+MAX_INSERT_CHUNK = 1000
+
+# Размер пачки при потоковом чтении
+STREAM_BATCH_SIZE = 1000
+
+# Максимальная длина списка в условии IN
+IN_LIST_CHUNK = 1000
+
+# Максимальное число записей в кэше get_cached (на процесс)
+ID_CACHE_MAX_SIZE = 100
+
+# Ключ session.info с действиями, отложенными до COMMIT (см. after_commit)
+AFTER_COMMIT_KEY = 'after_commit'
+
+# Запущенные после COMMIT задачи (ссылки держатся до завершения)
+_after_commit_tasks: Set[asyncio.Task] = set()
+
+
+@event.listens_for(Session, 'after_commit')
+def _run_after_commit(session: Session) -> None:
+    """
+    Запуск действий, отложенных до фиксации транзакции.
+
+    Событие синхронное, поэтому корутины запускаются задачами в текущем
+    цикле событий. Действия выполняются только при фиксации внешней
+    транзакции.
+
+    Args:
+        session: Зафиксированная сессия
+    """
+    # Событие приходит и при освобождении точки сохранения
+    if session.in_nested_transaction():
+        return
+
+    callbacks = session.info.pop(AFTER_COMMIT_KEY, None)
+    if not callbacks:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        logger.warning("Действия после COMMIT пропущены: нет цикла событий")
+        return
+
+    for callback in callbacks.values():
+        task = loop.create_task(callback())
+        _after_commit_tasks.add(task)
+        task.add_done_callback(_after_commit_tasks.discard)
+
+
+@event.listens_for(Session, 'after_soft_rollback')
+def _discard_after_commit(session: Session, previous_transaction) -> None:
+    """
+    Отмена отложенных действий при откате внешней транзакции.
+
+    Откат точки сохранения их не трогает: внешняя транзакция еще может
+    быть зафиксирована.
+
+    Args:
+        session: Сессия
+        previous_transaction: Откаченная транзакция
+    """
+    if previous_transaction.parent is None:
+        session.info.pop(AFTER_COMMIT_KEY, None)
+
+
+def _as_list(value: Any) -> List[Any]:
+    """Приведение значения фильтра к списку."""
+    return value if isinstance(value, list) else [value]
+
+
+def _between(field: Any, value: Any):
+    """Условие BETWEEN (None, если значение не пара)."""
+    if isinstance(value, list) and len(value) == 2:
+        return field.between(value[0], value[1])
+    return None
+
+
+# Построители условий по оператору фильтра
+_OP_DISPATCH: Dict[FilterOperator, Callable[[Any, Any], Any]] = {
+    FilterOperator.EQ: lambda field, value: field == value,
+    FilterOperator.NE: lambda field, value: field != value,
+    FilterOperator.GT: lambda field, value: field > value,
+    FilterOperator.GTE: lambda field, value: field >= value,
+    FilterOperator.LT: lambda field, value: field < value,
+    FilterOperator.LTE: lambda field, value: field <= value,
+    FilterOperator.IN: lambda field, value: field.in_(_as_list(value)),
+    FilterOperator.NOT_IN: lambda field, value: ~field.in_(_as_list(value)),
+    FilterOperator.LIKE: lambda field, value: field.like(f"%{value}%"),
+    FilterOperator.ILIKE: lambda field, value: field.ilike(f"%{value}%"),
+    # LIKE/ILIKE с ведущим % не используют индексы. PREFIX работает по
+    # btree-индексу, TRGM - по GIN-индексу pg_trgm:
+    # CREATE INDEX ... USING gin (field gin_trgm_ops)
+    FilterOperator.PREFIX: lambda field, value: field.like(f"{value}%"),
+    FilterOperator.TRGM: lambda field, value: field.op('%')(value),
+    FilterOperator.IS_NULL: lambda field, value: field.is_(None) if value else field.isnot(None),
+    FilterOperator.BETWEEN: _between,
+}
+
 
 class BaseRepository(Generic[T], IRepository[T], ABC):
     """
@@ -45,6 +154,22 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
     Предоставляет общие методы для работы с любыми моделями.
     """
 
+    # Колонки моделей по имени атрибута (вычисляются один раз на класс)
+    _field_cache: Dict[type, Dict[str, Column]] = {}
+
+    # Можно ли обновлять модель одним UPDATE в обход ORM (см. update)
+    _direct_update_cache: Dict[type, bool] = {}
+
+    # Базовые SELECT по (модель, отношения для загрузки)
+    _stmt_cache: Dict[Tuple[type, Tuple[str, ...]], Select] = {}
+
+    # TTL кэша get_cached в секундах. None - кэш выключен; включайте
+    # только для редко изменяемых справочных моделей
+    cache_ttl: Optional[float] = None
+
+    # Кэш get_cached: (модель, id) -> (словарь полей, время истечения)
+    _id_cache: "OrderedDict[Tuple[type, Any], Tuple[Dict[str, Any], float]]" = OrderedDict()
+
     def __init__(self, session: AsyncSession, model_class: Type[T]):
         """
         Инициализация репозитория.
@@ -55,13 +180,43 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         """
         self.session = session
         self.model_class = model_class
-        self._query_count = 0
 
     @property
     def model_name(self) -> str:
         """Имя модели для логирования."""
         return self.model_class.__name__
 
+    def _fields(self) -> Dict[str, Column]:
+        """
+        Колонки модели по имени атрибута.
+
+        Returns:
+            Словарь имя атрибута -> колонка
+        """
+        fields = BaseRepository._field_cache.get(self.model_class)
+        if fields is None:
+            fields = dict(sa_inspect(self.model_class).columns.items())
+            BaseRepository._field_cache[self.model_class] = fields
+        return fields
+
+    def _supports_direct_update(self) -> bool:
+        """
+        Можно ли изменять модель Core-запросами (UPDATE/INSERT ... RETURNING).
+
+        Такие запросы не проходят через ORM, поэтому не вызывают валидаторы
+        (@validates) и обработчики, увеличивающие version. Для моделей с
+        ними update и create_many работают через экземпляры.
+
+        Returns:
+            True, если у модели нет валидаторов и колонки version
+        """
+        supported = BaseRepository._direct_update_cache.get(self.model_class)
+        if supported is None:
+            mapper = sa_inspect(self.model_class)
+            supported = not mapper.validators and 'version' not in mapper.columns
+            BaseRepository._direct_update_cache[self.model_class] = supported
+        return supported
+
     # CREATE операции
 
     async def create(self, **kwargs) -> T:
@@ -86,10 +241,13 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             self.session.add(instance)
             await self.session.flush()
 
-            # Обновление из БД для получения defaults
-            await self.session.refresh(instance)
+            # Серверные значения по умолчанию на PostgreSQL приходят через
+            # RETURNING при flush (eager_defaults="auto"). Дочитываем запись,
+            # только если какие-то колонки так и остались незагруженными
+            if sa_inspect(instance).unloaded & self._fields().keys():
+                await self.session.refresh(instance)
 
-            logger.info(f"Создана запись {self.model_name} id={instance.id}")
+            logger.debug("Создана запись %s id=%s", self.model_name, instance.id)
             return instance
 
         except IntegrityError as e:
@@ -103,30 +261,79 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             logger.error(f"Ошибка создания {self.model_name}: {e}")
             raise DatabaseError(f"Ошибка создания записи", details={"error": str(e)})
 
-    async def create_many(self, items: List[Dict[str, Any]]) -> List[T]:
+    async def create_many(
+            self,
+            items: List[Dict[str, Any]],
+            chunk_size: Optional[int] = None
+    ) -> List[T]:
         """
         Массовое создание записей.
 
+        Выполняется через INSERT ... RETURNING пачками: значения по умолчанию,
+        заполненные БД, возвращаются сразу, без SELECT на каждую запись.
+        Модели с валидаторами @validates или колонкой version создаются
+        через экземпляры (add_all + flush), чтобы валидаторы и обработчики
+        ORM выполнились (см. _supports_direct_update).
+
         Args:
-            items: Список словарей с данными
+            items: Список словарей с данными (только колонки)
+            chunk_size: Размер пачки (по умолчанию - максимум, при котором
+                запрос укладывается в лимит параметров)
 
         Returns:
             Список созданных записей
         """
+        if not items:
+            return []
+
+        if not self._supports_direct_update():
+            return await self._create_many_instances(items)
+
+        chunk_size = chunk_size or self._insert_chunk_size()
+
         try:
+            stmt = insert(self.model_class).returning(self.model_class)
             instances = []
-            for item_data in items:
-                instance = self.model_class(**item_data)
-                self.session.add(instance)
-                instances.append(instance)
 
+            # Отложенные изменения сбрасываются один раз, а не перед каждой пачкой
             await self.session.flush()
+            with self.session.no_autoflush:
+                for start in range(0, len(items), chunk_size):
+                    result = await self.session.execute(
+                        stmt,
+                        items[start:start + chunk_size]
+                    )
+                    instances.extend(result.scalars().all())
+
+            logger.info("Создано %d записей %s", len(instances), self.model_name)
+            return instances
 
-            # Обновление всех записей
-            for instance in instances:
-                await self.session.refresh(instance)
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Ошибка массового создания {self.model_name}: {e}")
+            raise DatabaseError("Ошибка массового создания", details={"error": str(e)})
+
+    async def _create_many_instances(self, items: List[Dict[str, Any]]) -> List[T]:
+        """
+        Массовое создание записей через экземпляры ORM.
 
-            logger.info(f"Создано {len(instances)} записей {self.model_name}")
+        Конструктор модели вызывает валидаторы @validates, а flush -
+        события ORM для вставки. Вставку ORM по-прежнему отправляет
+        пачками (insertmanyvalues) и получает значения по умолчанию через
+        RETURNING.
+
+        Args:
+            items: Список словарей с данными
+
+        Returns:
+            Список созданных записей
+        """
+        try:
+            instances = [self.model_class(**item) for item in items]
+            self.session.add_all(instances)
+            await self.session.flush()
+
+            logger.info("Создано %d записей %s", len(instances), self.model_name)
             return instances
 
         except Exception as e:
@@ -134,32 +341,122 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             logger.error(f"Ошибка массового создания {self.model_name}: {e}")
             raise DatabaseError("Ошибка массового создания", details={"error": str(e)})
 
+    def _insert_chunk_size(self) -> int:
+        """
+        Размер пачки для массовой вставки.
+
+        Returns:
+            Количество строк, при котором INSERT не превышает лимит параметров
+        """
+        columns = len(self.model_class.__table__.columns)
+        return max(1, min(MAX_INSERT_CHUNK, MAX_BIND_PARAMS // max(columns, 1)))
+
     # READ операции
 
     async def get_by_id(self, id: int) -> Optional[T]:
         """
         Получение записи по ID.
 
+        Сначала проверяется identity map сессии: если запись уже загружена
+        в рамках текущего запроса, SELECT не выполняется.
+
         Args:
             id: ID записи
 
         Returns:
             Найденная запись или None
         """
-        self._query_count += 1
-
-        query = select(self.model_class).where(self.model_class.id == id)
-        result = await self.session.execute(query)
-
-        instance = result.scalar_one_or_none()
+        instance = await self.session.get(self.model_class, id)
 
         if instance:
-            logger.debug(f"Найдена запись {self.model_name} id={id}")
+            logger.debug("Найдена запись %s id=%s", self.model_name, id)
         else:
-            logger.debug(f"Не найдена запись {self.model_name} id={id}")
+            logger.debug("Не найдена запись %s id=%s", self.model_name, id)
 
         return instance
 
+    async def get_cached(self, id: int) -> Optional[Dict[str, Any]]:
+        """
+        Получение записи по ID через кэш процесса.
+
+        Возвращается словарь полей (to_dict), а не ORM-объект: он не
+        привязан к сессии и может безопасно переживать ее. Кэш работает
+        только если у репозитория задан cache_ttl.
+
+        Args:
+            id: ID записи
+
+        Returns:
+            Поля записи или None
+        """
+        if not self.cache_ttl:
+            instance = await self.get_by_id(id)
+            return instance.to_dict() if instance else None
+
+        key = (self.model_class, id)
+        entry = self._id_cache.get(key)
+        if entry is not None:
+            data, expires_at = entry
+            if expires_at > time.monotonic():
+                self._id_cache.move_to_end(key)
+                return data
+            del self._id_cache[key]
+
+        instance = await self.get_by_id(id)
+        if instance is None:
+            return None
+
+        data = instance.to_dict()
+        self._id_cache[key] = (data, time.monotonic() + self.cache_ttl)
+        if len(self._id_cache) > ID_CACHE_MAX_SIZE:
+            self._id_cache.popitem(last=False)
+        return data
+
+    def invalidate_cached(self, id: Optional[int] = None) -> None:
+        """
+        Удаление записей модели из кэша get_cached.
+
+        Args:
+            id: ID записи; None - все записи модели
+        """
+        if not self.cache_ttl:
+            return
+
+        if id is not None:
+            self._id_cache.pop((self.model_class, id), None)
+            return
+
+        for key in [key for key in self._id_cache if key[0] is self.model_class]:
+            del self._id_cache[key]
+
+    def after_commit(self, key: str, callback: Callable[[], Awaitable[Any]]) -> None:
+        """
+        Отложить действие до фиксации транзакции сессии.
+
+        Используется для сброса внешних кэшей: сброс внутри открытой
+        транзакции позволил бы параллельному чтению снова закэшировать
+        еще не зафиксированное состояние. При откате действие не
+        выполняется. Повторная регистрация с тем же ключом заменяет
+        предыдущую.
+
+        Args:
+            key: Ключ действия (например, ключ кэша)
+            callback: Функция без аргументов, возвращающая корутину
+        """
+        self.session.info.setdefault(AFTER_COMMIT_KEY, {})[key] = callback
+
+    def has_pending_commit_action(self, key: str) -> bool:
+        """
+        Отложено ли действие с ключом key до фиксации транзакции.
+
+        Args:
+            key: Ключ действия
+
+        Returns:
+            True, если транзакция уже изменила данные под этим ключом
+        """
+        return key in self.session.info.get(AFTER_COMMIT_KEY, ())
+
     async def get_by_id_or_fail(self, id: int) -> T:
         """
         Получение записи по ID с исключением при отсутствии.
@@ -196,10 +493,8 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             Список записей
         """
         query = self._build_query(options)
-        result = await self.session.execute(query)
-
-        instances = result.scalars().all()
-        logger.debug(f"Получено {len(instances)} записей {self.model_name}")
+        instances = (await self.session.scalars(query)).all()
+        logger.debug("Получено %d записей %s", len(instances), self.model_name)
 
         return list(instances)
 
@@ -211,6 +506,11 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         """
         Получение страницы записей.
 
+        Если в pagination передан курсор after (next_cursor предыдущей
+        страницы), используется keyset-пагинация по (sort_key, id) вместо
+        OFFSET, который заставляет БД просматривать и отбрасывать все
+        предыдущие строки.
+
         Args:
             pagination: Параметры пагинации
             options: Опции запроса
@@ -221,33 +521,196 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         # Построение базового запроса
         query = self._build_query(options)
 
-        # Подсчет общего количества
-        count_query = select(func.count()).select_from(query.subquery())
-        total_result = await self.session.execute(count_query)
-        total = total_result.scalar() or 0
+        # Ключ курсора: поле сортировки и id для однозначного порядка
+        keyset_attrs = self._keyset_attrs(pagination.sort_key)
+        keyset_columns = [getattr(self.model_class, attr) for attr in keyset_attrs]
+
+        if pagination.after is not None:
+            return await self._get_keyset_page(query, pagination, keyset_columns)
+
+        # Без явной сортировки упорядочиваем по ключу курсора, чтобы
+        # следующую страницу можно было запросить через keyset
+        keyset_ready = not (options and options.sort_by)
+        if keyset_ready:
+            query = query.order_by(*(column.asc() for column in keyset_columns))
+
+        if query._distinct or query._group_by_clauses:
+            # Оконный подсчет не совпадает с числом строк при DISTINCT/GROUP BY
+            count_query = select(func.count()).select_from(query.subquery())
+            total_result = await self.session.execute(count_query)
+            total = total_result.scalar() or 0
+
+            query = query.offset(pagination.offset).limit(pagination.limit)
+            items = list((await self.session.scalars(query)).all())
+        else:
+            # Общее количество приходит в той же выборке через count(*) OVER ()
+            query = (
+                query
+                .add_columns(func.count().over().label("total_count"))
+                .offset(pagination.offset)
+                .limit(pagination.limit)
+            )
+            result = await self.session.execute(query)
+            rows = result.all()
+            items = [row[0] for row in rows]
 
-        # Применение пагинации
-        offset = (pagination.page - 1) * pagination.size
-        query = query.offset(offset).limit(pagination.size)
+            if rows:
+                total = rows[0].total_count
+            else:
+                # Страница за пределами выборки - отдельный подсчет
+                total = await self.count(options)
 
-        # Получение записей
-        result = await self.session.execute(query)
-        items = list(result.scalars().all())
+        next_cursor = None
+        if keyset_ready:
+            next_cursor = self._next_cursor(items, pagination, keyset_attrs)
 
-        # Расчет страниц
-        total_pages = (total + pagination.size - 1) // pagination.size
+        page = Page(
+            items=items,
+            total=total,
+            page=pagination.page,
+            page_size=pagination.page_size,
+            next_cursor=next_cursor
+        )
 
         logger.debug(
-            f"Получена страница {pagination.page}/{total_pages} "
-            f"{self.model_name} ({len(items)} записей)"
+            "Получена страница %s/%s %s (%d записей)",
+            pagination.page, page.total_pages, self.model_name, len(items)
         )
 
+        return page
+
+    async def _get_keyset_page(
+            self,
+            query: Select,
+            pagination: Pagination,
+            keyset_columns: List[Column]
+    ) -> Page[T]:
+        """
+        Получение страницы по курсору (keyset-пагинация).
+
+        Args:
+            query: Базовый запрос с фильтрами
+            pagination: Параметры пагинации с курсором after
+            keyset_columns: Колонки ключа курсора
+
+        Returns:
+            Страница с записями (total не считается)
+        """
+        query = self._apply_pagination(
+            query.order_by(None).order_by(*(column.asc() for column in keyset_columns)),
+            pagination,
+            keyset_columns,
+            descending=False
+        )
+
+        items = list((await self.session.scalars(query)).all())
+
+        logger.debug(
+            "Получена страница %s после %s=%s (%d записей)",
+            self.model_name, pagination.sort_key, pagination.after, len(items)
+        )
+
+        return self._keyset_page(
+            items, pagination, [column.key for column in keyset_columns]
+        )
+
+    @staticmethod
+    def _keyset_attrs(sort_key: str) -> List[str]:
+        """
+        Атрибуты ключа курсора для сортировки по sort_key.
+
+        Args:
+            sort_key: Поле сортировки
+
+        Returns:
+            sort_key и id (только id, если сортировка по id)
+        """
+        return [sort_key] if sort_key == 'id' else [sort_key, 'id']
+
+    @staticmethod
+    def _apply_pagination(
+            query: Select,
+            pagination: Optional[Pagination],
+            keyset_columns: List[Column],
+            descending: bool = True
+    ) -> Select:
+        """
+        Применение пагинации к упорядоченному запросу.
+
+        С курсором after выбираются строки строго после него в порядке
+        запроса (сравнение кортежей по keyset_columns), иначе - страница
+        по номеру через OFFSET.
+
+        Args:
+            query: Запрос, уже упорядоченный по keyset_columns
+            pagination: Параметры пагинации (None - без ограничения)
+            keyset_columns: Колонки ключа курсора в порядке сортировки
+            descending: Сортировка по убыванию
+
+        Returns:
+            Запрос с условием курсора или OFFSET и LIMIT
+        """
+        if pagination is None:
+            return query
+
+        if pagination.after is not None:
+            row = tuple_(*keyset_columns)
+            cursor = tuple_(*pagination.after)
+            return query.where(
+                row < cursor if descending else row > cursor
+            ).limit(pagination.limit)
+
+        return query.offset(pagination.offset).limit(pagination.limit)
+
+    @staticmethod
+    def _next_cursor(
+            items: List[Any],
+            pagination: Pagination,
+            keyset_attrs: List[str]
+    ) -> Optional[Tuple[Any, ...]]:
+        """
+        Курсор следующей страницы.
+
+        Args:
+            items: Записи текущей страницы
+            pagination: Параметры пагинации
+            keyset_attrs: Атрибуты ключа курсора
+
+        Returns:
+            Кортеж значений ключа последней записи или None, если
+            страница неполная
+        """
+        if not items or len(items) < pagination.page_size:
+            return None
+        last = items[-1]
+        return tuple(getattr(last, attr) for attr in keyset_attrs)
+
+    def _keyset_page(
+            self,
+            items: List[T],
+            pagination: Optional[Pagination],
+            keyset_attrs: List[str]
+    ) -> Page[T]:
+        """
+        Страница списка без подсчета общего количества.
+
+        Args:
+            items: Записи страницы
+            pagination: Параметры пагинации (None - весь список)
+            keyset_attrs: Атрибуты ключа курсора
+
+        Returns:
+            Страница с курсором next_cursor для следующего запроса
+        """
+        if pagination is None:
+            return Page(items=items, total=None, page=1, page_size=len(items))
+
         return Page(
             items=items,
-            total=total,
+            total=None,
             page=pagination.page,
-            size=pagination.size,
-            pages=total_pages
+            page_size=pagination.page_size,
+            next_cursor=self._next_cursor(items, pagination, keyset_attrs)
         )
 
     async def find_one(self, **filters) -> Optional[T]:
@@ -260,15 +723,9 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             Найденная запись или None
         """
-        query = select(self.model_class)
-
-        # Применение фильтров
-        for field, value in filters.items():
-            if hasattr(self.model_class, field):
-                query = query.where(getattr(self.model_class, field) == value)
+        query = select(self.model_class).where(*self._equality_conditions(filters))
 
-        result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        return (await self.session.scalars(query)).one_or_none()
 
     async def find_many(self, **filters) -> List[T]:
         """
@@ -280,18 +737,36 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             Список найденных записей
         """
-        query = select(self.model_class)
+        query = select(self.model_class).where(*self._equality_conditions(filters))
 
-        # Применение фильтров
-        for field, value in filters.items():
-            if hasattr(self.model_class, field):
-                if isinstance(value, list):
-                    query = query.where(getattr(self.model_class, field).in_(value))
-                else:
-                    query = query.where(getattr(self.model_class, field) == value)
+        return list((await self.session.scalars(query)).all())
+
+    async def iter_many(
+            self,
+            batch_size: int = STREAM_BATCH_SIZE,
+            **filters
+    ) -> AsyncIterator[T]:
+        """
+        Потоковый обход записей по фильтрам.
+
+        Записи читаются с сервера пачками по batch_size, поэтому весь
+        результат не материализуется в памяти. Подходит для больших выборок
+        (рассылки, миграции данных).
+
+        Args:
+            batch_size: Размер пачки при чтении
+            **filters: Поля для фильтрации
 
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+        Yields:
+            Записи модели
+        """
+        query = select(self.model_class).where(*self._equality_conditions(filters))
+
+        result = await self.session.stream_scalars(
+            query.execution_options(yield_per=batch_size)
+        )
+        async for instance in result:
+            yield instance
 
     async def exists(self, **filters) -> bool:
         """
@@ -303,16 +778,13 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             True если запись существует
         """
-        query = select(func.count()).select_from(self.model_class)
-
-        for field, value in filters.items():
-            if hasattr(self.model_class, field):
-                query = query.where(getattr(self.model_class, field) == value)
-
-        result = await self.session.execute(query)
-        count = result.scalar() or 0
+        query = select(literal(1)).select_from(self.model_class).where(
+            *self._equality_conditions(filters)
+        )
 
-        return count > 0
+        # БД останавливается на первой подходящей строке
+        result = await self.session.execute(query.limit(1))
+        return result.first() is not None
 
     async def count(self, options: Optional[QueryOptions] = None) -> int:
         """
@@ -324,30 +796,97 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             Количество записей
         """
-        query = self._build_query(options)
-        count_query = select(func.count()).select_from(query.subquery())
+        # Сортировка и загрузка отношений на количество не влияют, поэтому
+        # подзапрос не нужен: COUNT(*) строится прямо по таблице
+        count_query = select(func.count()).select_from(self.model_class)
+
+        if options and options.filters:
+            conditions = self._build_filter_conditions(options.filters)
+            if conditions is not None:
+                count_query = count_query.where(conditions)
 
         result = await self.session.execute(count_query)
         return result.scalar() or 0
 
+    async def count_estimate(self) -> int:
+        """
+        Приблизительное количество записей по статистике PostgreSQL.
+
+        Берется pg_class.reltuples (обновляется VACUUM/ANALYZE), поэтому
+        таблица не сканируется. Если статистики еще нет, выполняется
+        точный подсчет.
+
+        Returns:
+            Оценка количества записей
+        """
+        result = await self.session.execute(
+            text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+            {"table": self.model_class.__tablename__}
+        )
+        estimate = result.scalar()
+
+        if estimate is None or estimate < 0:
+            return await self.count()
+        return estimate
+
     # UPDATE операции
 
     async def update(self, id: int, **kwargs) -> Optional[T]:
         """
         Обновление записи по ID.
 
+        Если у модели нет валидаторов и версионирования, а все поля -
+        колонки, выполняется одним UPDATE ... RETURNING без предварительной
+        выборки. Иначе запись загружается и обновляется через
+        update_instance, чтобы отработали валидаторы и обработчики ORM.
+        Если экземпляр уже на руках, используйте update_instance.
+
         Args:
             id: ID записи
             **kwargs: Поля для обновления
 
         Returns:
             Обновленная запись или None
+
+        Raises:
+            ValidationError: Если у модели нет какого-либо из полей
         """
-        instance = await self.get_by_id(id)
-        if not instance:
-            return None
+        for field in kwargs:
+            if not hasattr(self.model_class, field):
+                raise ValidationError(
+                    field=field,
+                    message=f"У модели {self.model_name} нет поля {field}"
+                )
+
+        if not kwargs:
+            return await self.get_by_id(id)
+
+        if not self._supports_direct_update() or not kwargs.keys() <= self._fields().keys():
+            instance = await self.get_by_id(id)
+            if instance is None:
+                return None
+            return await self.update_instance(instance, **kwargs)
 
-        return await self.update_instance(instance, **kwargs)
+        try:
+            stmt = (
+                update(self.model_class)
+                .where(self.model_class.id == id)
+                .values(**kwargs)
+                .returning(self.model_class)
+                .execution_options(synchronize_session="fetch")
+            )
+            result = await self.session.execute(stmt)
+            instance = result.scalar_one_or_none()
+
+            if instance:
+                self.invalidate_cached(id)
+                logger.debug("Обновлена запись %s id=%s", self.model_name, id)
+            return instance
+
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Ошибка обновления {self.model_name}: {e}")
+            raise DatabaseError("Ошибка обновления записи", details={"error": str(e)})
 
     async def update_instance(self, instance: T, **kwargs) -> T:
         """
@@ -368,8 +907,9 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
 
             await self.session.flush()
             await self.session.refresh(instance)
+            self.invalidate_cached(instance.id)
 
-            logger.info(f"Обновлена запись {self.model_name} id={instance.id}")
+            logger.debug("Обновлена запись %s id=%s", self.model_name, instance.id)
             return instance
 
         except Exception as e:
@@ -393,20 +933,18 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             Количество обновленных записей
         """
         try:
-            stmt = update(self.model_class)
-
-            # Применение фильтров
-            for field, value in filters.items():
-                if hasattr(self.model_class, field):
-                    stmt = stmt.where(getattr(self.model_class, field) == value)
+            stmt = update(self.model_class).where(
+                *self._equality_conditions(filters)
+            )
 
             # Установка значений
             stmt = stmt.values(**updates)
 
             result = await self.session.execute(stmt)
             count = result.rowcount
+            self.invalidate_cached()
 
-            logger.info(f"Обновлено {count} записей {self.model_name}")
+            logger.info("Обновлено %d записей %s", count, self.model_name)
             return count
 
         except Exception as e:
@@ -420,17 +958,31 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         """
         Удаление записи по ID.
 
+        Выполняется одним DELETE без предварительной выборки: зависимые
+        записи удаляет БД через ON DELETE CASCADE. Для удаления с
+        ORM-событиями используйте delete_instance.
+
         Args:
             id: ID записи
 
         Returns:
             True если запись удалена
         """
-        instance = await self.get_by_id(id)
-        if not instance:
-            return False
+        try:
+            result = await self.session.execute(
+                delete(self.model_class).where(self.model_class.id == id)
+            )
+            deleted = result.rowcount > 0
 
-        return await self.delete_instance(instance)
+            if deleted:
+                self.invalidate_cached(id)
+                logger.debug("Удалена запись %s id=%s", self.model_name, id)
+            return deleted
+
+        except Exception as e:
+            await self.session.rollback()
+            logger.error(f"Ошибка удаления {self.model_name}: {e}")
+            raise DatabaseError("Ошибка удаления записи", details={"error": str(e)})
 
     async def delete_instance(self, instance: T) -> bool:
         """
@@ -445,8 +997,9 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         try:
             await self.session.delete(instance)
             await self.session.flush()
+            self.invalidate_cached(instance.id)
 
-            logger.info(f"Удалена запись {self.model_name} id={instance.id}")
+            logger.debug("Удалена запись %s id=%s", self.model_name, instance.id)
             return True
 
         except Exception as e:
@@ -465,14 +1018,25 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
             Количество удаленных записей
         """
         try:
-            stmt = delete(self.model_class).where(
-                self.model_class.id.in_(ids)
-            )
-
-            result = await self.session.execute(stmt)
-            count = result.rowcount
-
-            logger.info(f"Удалено {count} записей {self.model_name}")
+            # Короткие IN-списки: без упора в лимит параметров и с
+            # переиспользованием плана. Пачки идут последовательно -
+            # AsyncSession не выполняет запросы параллельно
+            count = 0
+            await self.session.flush()
+            with self.session.no_autoflush:
+                for start in range(0, len(ids), IN_LIST_CHUNK):
+                    result = await self.session.execute(
+                        delete(self.model_class).where(
+                            self.model_class.id.in_(ids[start:start + IN_LIST_CHUNK])
+                        )
+                    )
+                    count += result.rowcount
+
+            if self.cache_ttl:
+                for id in ids:
+                    self.invalidate_cached(id)
+
+            logger.info("Удалено %d записей %s", count, self.model_name)
             return count
 
         except Exception as e:
@@ -482,6 +1046,32 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
 
     # Вспомогательные методы
 
+    def _base_select(self, relations: Tuple[str, ...] = ()) -> Select:
+        """
+        Базовый SELECT модели с загрузкой отношений.
+
+        Select неизменяем, поэтому готовый объект кэшируется на уровне
+        класса по (модель, отношения) и не собирается заново на каждый
+        вызов; скомпилированный SQL SQLAlchemy кэширует сам.
+
+        Args:
+            relations: Имена отношений для selectinload
+
+        Returns:
+            Запрос SQLAlchemy
+        """
+        key = (self.model_class, relations)
+        query = BaseRepository._stmt_cache.get(key)
+        if query is None:
+            query = select(self.model_class)
+            for relation in relations:
+                if hasattr(self.model_class, relation):
+                    query = query.options(selectinload(
+                        getattr(self.model_class, relation)
+                    ))
+            BaseRepository._stmt_cache[key] = query
+        return query
+
     def _build_query(self, options: Optional[QueryOptions] = None) -> Select:
         """
         Построение запроса с учетом опций.
@@ -492,10 +1082,14 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             Построенный запрос SQLAlchemy
         """
-        query = select(self.model_class)
+        if not options or not (
+                options.filters or options.sort or options.include_relations
+        ):
+            return self._base_select()
 
-        if not options:
-            return query
+        # Отношения для загрузки входят в кэшируемый базовый запрос
+        relations = tuple(options.include_relations or ())
+        query = self._base_select(relations)
 
         # Применение фильтров
         if options.filters:
@@ -505,51 +1099,89 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
 
         # Применение сортировки
         if options.sort:
+            fields = self._fields()
             for sort_field, order in options.sort:
-                if hasattr(self.model_class, sort_field):
-                    field = getattr(self.model_class, sort_field)
+                field = fields.get(sort_field)
+                if field is not None:
                     if order == SortOrder.DESC:
                         query = query.order_by(field.desc())
                     else:
                         query = query.order_by(field.asc())
 
-        # Применение отношений для загрузки
-        if options.include_relations:
-            for relation in options.include_relations:
-                if hasattr(self.model_class, relation):
-                    query = query.options(selectinload(
-                        getattr(self.model_class, relation)
-                    ))
-
         return query
 
-    def _build_filter_conditions(self, filters: List[Union[Filter, FilterGroup]]):
+    def _equality_conditions(self, filters: Dict[str, Any]) -> List[Any]:
         """
-        Построение условий фильтрации.
+        Условия равенства по именованным фильтрам.
+
+        Списки превращаются в IN с расширяемым (expanding) параметром, поэтому
+        скомпилированный запрос переиспользуется при любой длине списка.
+        Поля, которых нет среди колонок модели, игнорируются.
 
         Args:
-            filters: Список фильтров
+            filters: Поле -> значение (или список значений)
 
         Returns:
-            Условия для WHERE
+            Список условий для where(*conditions)
         """
+        fields = self._fields()
         conditions = []
+        for field, value in filters.items():
+            column = fields.get(field)
+            if column is None:
+                continue
+            if isinstance(value, (list, tuple, set)):
+                conditions.append(column.in_(value))
+            else:
+                conditions.append(column == value)
+        return conditions
+
+    def _build_filter_conditions(
+            self,
+            filters: Union[List[Union[Filter, FilterGroup]], FilterGroup]
+    ):
+        """
+        Построение условий фильтрации.
+
+        Дерево групп обходится итеративно, с явным стеком: условия группы
+        собираются в and_/or_ в момент, когда группа полностью разобрана.
 
-        for filter_item in filters:
-            if isinstance(filter_item, Filter):
-                condition = self._build_single_filter(filter_item)
+        Args:
+            filters: Список фильтров или группа фильтров
+
+        Returns:
+            Условия для WHERE
+        """
+        if isinstance(filters, FilterGroup):
+            filters = [filters]
+
+        fields = self._fields()
+        root: List[Any] = []
+        # Кадр стека: (оставшиеся элементы, собранные условия, оператор группы)
+        stack = [(iter(filters), root, "AND")]
+
+        while stack:
+            items, conditions, operator = stack[-1]
+
+            for item in items:
+                if isinstance(item, FilterGroup):
+                    stack.append((iter(item.filters), [], item.operator))
+                    break
+
+                field = fields.get(item.field)
+                build = _OP_DISPATCH.get(item.operator)
+                if field is None or build is None:
+                    continue
+                condition = build(field, item.value)
                 if condition is not None:
                     conditions.append(condition)
+            else:
+                stack.pop()
+                if stack and conditions:
+                    combine = or_ if operator == "OR" else and_
+                    stack[-1][1].append(combine(*conditions))
 
-            elif isinstance(filter_item, FilterGroup):
-                group_conditions = self._build_filter_conditions(filter_item.filters)
-                if group_conditions:
-                    if filter_item.operator == "AND":
-                        conditions.append(and_(*group_conditions))
-                    else:
-                        conditions.append(or_(*group_conditions))
-
-        return and_(*conditions) if conditions else None
+        return and_(*root) if root else None
 
     def _build_single_filter(self, filter: Filter):
         """
@@ -561,39 +1193,15 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         Returns:
             Условие SQLAlchemy
         """
-        if not hasattr(self.model_class, filter.field):
+        field = self._fields().get(filter.field)
+        if field is None:
+            return None
+
+        build = _OP_DISPATCH.get(filter.operator)
+        if build is None:
             return None
 
-        field = getattr(self.model_class, filter.field)
-        value = filter.value
-
-        if filter.operator == FilterOperator.EQ:
-            return field == value
-        elif filter.operator == FilterOperator.NE:
-            return field != value
-        elif filter.operator == FilterOperator.GT:
-            return field > value
-        elif filter.operator == FilterOperator.GTE:
-            return field >= value
-        elif filter.operator == FilterOperator.LT:
-            return field < value
-        elif filter.operator == FilterOperator.LTE:
-            return field <= value
-        elif filter.operator == FilterOperator.IN:
-            return field.in_(value if isinstance(value, list) else [value])
-        elif filter.operator == FilterOperator.NOT_IN:
-            return ~field.in_(value if isinstance(value, list) else [value])
-        elif filter.operator == FilterOperator.LIKE:
-            return field.like(f"%{value}%")
-        elif filter.operator == FilterOperator.ILIKE:
-            return field.ilike(f"%{value}%")
-        elif filter.operator == FilterOperator.IS_NULL:
-            return field.is_(None) if value else field.isnot(None)
-        elif filter.operator == FilterOperator.BETWEEN:
-            if isinstance(value, list) and len(value) == 2:
-                return field.between(value[0], value[1])
-
-        return None
+        return build(field, filter.value)
 
     @asynccontextmanager
     async def transaction(self):
@@ -636,12 +1244,3 @@ class BaseRepository(Generic[T], IRepository[T], ABC):
         except Exception as e:
             logger.error(f"Ошибка выполнения SQL: {e}")
             raise DatabaseError("Ошибка выполнения запроса", details={"error": str(e)})
-
-    @property
-    def query_count(self) -> int:
-        """Количество выполненных запросов."""
-        return self._query_count
-
-    def reset_query_count(self) -> None:
-        """Сброс счетчика запросов."""
-        self._query_count = 0
\ No newline at end of file
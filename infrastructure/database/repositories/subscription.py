@@ -10,15 +10,23 @@
 - Статистику и отчеты по платежам
 """
 
-from typing import Optional, List, Dict, Any, Tuple
-from datetime import datetime, date, timedelta
+from typing import Optional, List, Dict, Any, Tuple, AsyncIterator, NamedTuple
+from datetime import datetime, date, timedelta, timezone
 from decimal import Decimal
+from enum import Enum
+from uuid import uuid4
 import secrets
 import string
+import time
 
-from sqlalchemy import select, func, and_, or_, update, desc
+from sqlalchemy import (
+    select, insert, func, and_, or_, update, desc, tuple_, case, literal,
+    cast, Text, Float, JSON, bindparam
+)
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, aliased
+from sqlalchemy.sql import Select
 
 from config import logger, SubscriptionTier, PaymentStatus, PaymentProvider
 from core.interfaces.repository import (
@@ -28,12 +36,116 @@ from infrastructure.database.models import (
     User, Subscription, Payment, PromoCode, SubscriptionPlan,
     PaymentMethod, PromoCodeType
 )
+from infrastructure.database.repositories import invalidate_cached_user_by_id
 from infrastructure.database.repositories.base import BaseRepository
+from infrastructure.cache import cache_manager, cache_key
 from core.exceptions import (
-    EntityNotFoundError, ValidationError,
+    EntityNotFoundError, ValidationError, BusinessLogicError,
     InvalidStateTransitionError, PaymentError
 )
 
+# Время жизни кэша тарифных планов в секундах
+PLAN_CACHE_TTL = 60
+
+# Максимальное время жизни кэша активной подписки в секундах
+ACTIVE_SUBSCRIPTION_CACHE_TTL = 30
+
+# Через сколько повторить автопродление, если платеж так и не прошел
+RENEWAL_RETRY_INTERVAL = timedelta(days=1)
+
+# С какого размера пачки платежи загружаются через COPY
+PAYMENT_COPY_THRESHOLD = 1000
+
+# Колонки платежа, заполняемые при массовом создании
+_PAYMENT_BULK_COLUMNS = [
+    'uuid', 'user_id', 'amount', 'currency', 'status', 'provider',
+    'subscription_tier', 'subscription_period_days', 'payment_method_id'
+]
+
+# Сообщения об ошибках по состоянию промокода (см. validate_promo_code)
+_PROMO_STATE_ERRORS = {
+    'inactive': "Промокод неактивен",
+    'not_started': "Промокод еще не активен",
+    'expired': "Промокод истек",
+    'exhausted': "Промокод исчерпан",
+}
+
+# Кэш тарифных планов: ключ -> (время истечения, планы)
+_plan_cache: Dict[Tuple[Any, ...], Tuple[float, List[SubscriptionPlan]]] = {}
+
+
+# Готовые запросы горячих путей. Строятся один раз при импорте и
+# выполняются с параметрами, поэтому на каждый вызов не создается дерево
+# выражения, а ключ кэша компиляции SQLAlchemy вычисляется по готовому
+# объекту
+
+_ACTIVE_SUBSCRIPTION_FILTER = and_(
+    Subscription.user_id == bindparam('user_id'),
+    Subscription.expires_at > func.now(),
+    Subscription.is_cancelled == False
+)
+
+_ACTIVE_SUBSCRIPTION_LITE_STMT = select(Subscription).where(
+    _ACTIVE_SUBSCRIPTION_FILTER
+).order_by(Subscription.expires_at.desc())
+
+_ACTIVE_SUBSCRIPTION_FULL_STMT = _ACTIVE_SUBSCRIPTION_LITE_STMT.options(
+    selectinload(Subscription.payment),
+    selectinload(Subscription.promo_code)
+)
+
+_ACTIVE_SUBSCRIPTION_SUMMARY_STMT = select(
+    Subscription.id,
+    Subscription.tier,
+    Subscription.expires_at
+).where(
+    _ACTIVE_SUBSCRIPTION_FILTER
+).order_by(Subscription.expires_at.desc()).limit(1)
+
+_PAYMENT_BY_ID_STMT = select(Payment).where(Payment.id == bindparam('payment_id'))
+
+_PAYMENT_BY_ID_FOR_UPDATE_STMT = _PAYMENT_BY_ID_STMT.with_for_update().execution_options(
+    populate_existing=True
+)
+
+_PROMO_CODE_STMT = select(PromoCode).where(PromoCode.code == bindparam('code'))
+
+
+class ActiveSubscriptionSummary(NamedTuple):
+    """Краткие данные активной подписки (см. get_active_subscription_summary)."""
+
+    id: int
+    tier: SubscriptionTier
+    expires_at: datetime
+
+
+def _active_subscription_cache_key(user_id: int) -> str:
+    """Ключ кэша активной подписки пользователя."""
+    return cache_key("sub", user_id)
+
+
+def _tier_value(column):
+    """
+    Значение тарифа (SubscriptionTier.value) для колонки-перечисления.
+
+    В ENUM БД хранится имя элемента, поэтому для ключей, собираемых на
+    стороне БД, имя переводится в значение через CASE.
+
+    Args:
+        column: Колонка типа SubscriptionTier
+
+    Returns:
+        Выражение CASE со строковым значением тарифа
+    """
+    return case(
+        *[(column == tier, tier.value) for tier in SubscriptionTier]
+    )
+
+
+def invalidate_plan_cache() -> None:
+    """Сброс кэша тарифных планов (после изменения таблицы планов)."""
+    _plan_cache.clear()
+
 
 class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionRepository):
     """
@@ -60,21 +172,57 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         """
         Получение списка тарифных планов.
 
+        Планы почти не меняются, поэтому результат кэшируется в процессе на
+        PLAN_CACHE_TTL секунд. Объекты отсоединены от сессии и предназначены
+        только для чтения.
+
         Args:
             active_only: Только активные планы
 
         Returns:
             Список тарифных планов
         """
+        return list(await self._get_cached_plans(('all', active_only), active_only))
+
+    async def _get_cached_plans(
+            self,
+            key: Tuple[Any, ...],
+            active_only: bool = True,
+            tier: Optional[SubscriptionTier] = None
+    ) -> List[SubscriptionPlan]:
+        """
+        Получение тарифных планов через кэш процесса.
+
+        Args:
+            key: Ключ кэша
+            active_only: Только активные планы
+            tier: Уровень подписки (None - все уровни)
+
+        Returns:
+            Список тарифных планов (общий для всех вызовов, не изменять)
+        """
+        entry = _plan_cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+
         query = select(SubscriptionPlan)
 
         if active_only:
             query = query.where(SubscriptionPlan.is_active == True)
+        if tier is not None:
+            query = query.where(SubscriptionPlan.tier == tier)
 
         query = query.order_by(SubscriptionPlan.sort_order, SubscriptionPlan.monthly_price)
 
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        plans = list(result.scalars().all())
+
+        # Отсоединяем планы: после commit/закрытия сессии их поля не истекают
+        for plan in plans:
+            self.session.expunge(plan)
+
+        _plan_cache[key] = (time.monotonic() + PLAN_CACHE_TTL, plans)
+        return plans
 
     async def get_plan_by_tier(
             self,
@@ -83,30 +231,27 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         """
         Получение плана по уровню подписки.
 
+        Использует кэш тарифных планов (см. get_subscription_plans).
+
         Args:
             tier: Уровень подписки
 
         Returns:
             Найденный план или None
         """
-        query = select(SubscriptionPlan).where(
-            and_(
-                SubscriptionPlan.tier == tier,
-                SubscriptionPlan.is_active == True
-            )
-        )
-
-        result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+        plans = await self._get_cached_plans(('tier', tier), tier=tier)
+        return plans[0] if plans else None
 
     # Управление подписками
 
-    async def get_user_active_subscription(
+    async def get_user_active_subscription_full(
             self,
             user_id: int
     ) -> Optional[Subscription]:
         """
-        Получение активной подписки пользователя.
+        Получение активной подписки пользователя вместе с платежом и промокодом.
+
+        Для отдачи наружу (API, экран подписки), где нужны связанные объекты.
 
         Args:
             user_id: ID пользователя
@@ -114,20 +259,109 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Активная подписка или None
         """
-        query = select(Subscription).where(
-            and_(
-                Subscription.user_id == user_id,
-                Subscription.expires_at > datetime.utcnow(),
-                Subscription.is_cancelled == False
-            )
-        ).options(
-            selectinload(Subscription.payment),
-            selectinload(Subscription.promo_code)
-        ).order_by(Subscription.expires_at.desc())
+        result = await self.session.execute(
+            _ACTIVE_SUBSCRIPTION_FULL_STMT, {"user_id": user_id}
+        )
+        return result.scalar_one_or_none()
 
-        result = await self.session.execute(query)
+    async def get_user_active_subscription_lite(
+            self,
+            user_id: int
+    ) -> Optional[Subscription]:
+        """
+        Получение активной подписки пользователя без связанных объектов.
+
+        В отличие от get_user_active_subscription_full не выполняет два
+        дополнительных запроса за payment и promo_code. Для внутренних
+        вызовов, которым связи не нужны.
+
+        Args:
+            user_id: ID пользователя
+
+        Returns:
+            Активная подписка или None
+        """
+        result = await self.session.execute(
+            _ACTIVE_SUBSCRIPTION_LITE_STMT, {"user_id": user_id}
+        )
         return result.scalar_one_or_none()
 
+    async def get_active_subscription_summary(
+            self,
+            user_id: int,
+            use_cache: bool = True
+    ) -> Optional[ActiveSubscriptionSummary]:
+        """
+        Краткие данные активной подписки пользователя (id, tier, expires_at).
+
+        Быстрый вариант get_user_active_subscription_lite для обработки платежей
+        и проверок доступа к премиум-функциям: без ORM-объекта и догрузки
+        payment/promo_code. Результат кэшируется (Redis или память, см.
+        infrastructure.cache) не дольше ACTIVE_SUBSCRIPTION_CACHE_TTL и не
+        дольше срока действия подписки. Кэш сбрасывается после фиксации
+        транзакции, создавшей, продлившей или отменившей подписку. Если
+        текущая транзакция уже меняла подписки пользователя, кэш не
+        читается и не заполняется.
+
+        Args:
+            user_id: ID пользователя
+            use_cache: Использовать кэш (False - всегда читать из БД)
+
+        Returns:
+            Данные активной подписки или None
+        """
+        key = _active_subscription_cache_key(user_id)
+        use_cache = use_cache and not self.has_pending_commit_action(key)
+
+        cached = await cache_manager.get(key) if use_cache else None
+        if cached:
+            return ActiveSubscriptionSummary(
+                id=cached["id"],
+                tier=SubscriptionTier(cached["tier"]),
+                expires_at=datetime.fromisoformat(cached["expires_at"])
+            )
+
+        result = await self.session.execute(
+            _ACTIVE_SUBSCRIPTION_SUMMARY_STMT, {"user_id": user_id}
+        )
+        row = result.first()
+        if row is None:
+            return None
+
+        summary = ActiveSubscriptionSummary(row.id, row.tier, row.expires_at)
+
+        # Запись не должна пережить саму подписку
+        ttl = min(
+            ACTIVE_SUBSCRIPTION_CACHE_TTL,
+            int((summary.expires_at - datetime.now(timezone.utc)).total_seconds())
+        )
+        if use_cache and ttl > 0:
+            await cache_manager.set(key, {
+                "id": summary.id,
+                "tier": summary.tier.value,
+                "expires_at": summary.expires_at.isoformat()
+            }, ttl)
+
+        return summary
+
+    def _invalidate_active_subscription(self, user_id: int) -> None:
+        """
+        Сброс кэшей подписки пользователя после фиксации транзакции.
+
+        Сбрасываются сводка активной подписки и снимок пользователя в
+        кэше get_cached_user_snapshot (в нем хранится subscription_tier).
+
+        Args:
+            user_id: ID пользователя
+        """
+        key = _active_subscription_cache_key(user_id)
+        self.after_commit(key, lambda: cache_manager.delete(key))
+
+        async def invalidate_user() -> None:
+            invalidate_cached_user_by_id(user_id)
+
+        self.after_commit(f"user:{user_id}", invalidate_user)
+
     async def create_subscription(
             self,
             user_id: int,
@@ -153,29 +387,38 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Созданная подписка
         """
-        # Проверяем существующую активную подписку
-        existing = await self.get_user_active_subscription(user_id)
-        if existing:
-            # Отменяем старую подписку
-            existing.is_cancelled = True
-            existing.cancelled_at = datetime.utcnow()
-            logger.info(f"Отменена существующая подписка {existing.id}")
-
-        # Создаем новую подписку
-        started_at = datetime.utcnow()
-        expires_at = started_at + timedelta(days=period_days)
+        now = datetime.utcnow()
+        expires_at = now + timedelta(days=period_days)
 
-        subscription = await self.create(
+        # Отменяем действующие подписки одним UPDATE без предварительной выборки
+        cancel_stmt = update(Subscription).where(
+            and_(
+                Subscription.user_id == user_id,
+                Subscription.expires_at > func.now(),
+                Subscription.is_cancelled == False
+            )
+        ).values(
+            is_cancelled=True,
+            cancelled_at=now
+        ).returning(Subscription.id)
+        cancelled_ids = (await self.session.execute(cancel_stmt)).scalars().all()
+        if cancelled_ids:
+            logger.info(f"Отменены существующие подписки {list(cancelled_ids)}")
+
+        # Создаем новую подписку: INSERT ... RETURNING сразу возвращает
+        # значения по умолчанию, заполненные БД
+        insert_stmt = insert(Subscription).values(
             user_id=user_id,
             tier=tier,
-            started_at=started_at,
+            started_at=now,
             expires_at=expires_at,
             is_auto_renew=is_auto_renew,
             next_payment_date=expires_at if is_auto_renew else None,
             payment_id=payment_id,
             promo_code_id=promo_code_id,
             is_trial=is_trial
-        )
+        ).returning(Subscription)
+        subscription = (await self.session.execute(insert_stmt)).scalar_one()
 
         # Обновляем пользователя
         user_update = update(User).where(User.id == user_id).values(
@@ -184,6 +427,8 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         )
         await self.session.execute(user_update)
 
+        self._invalidate_active_subscription(user_id)
+
         logger.info(f"Создана подписка {tier} для пользователя {user_id} на {period_days} дней")
 
         return subscription
@@ -205,28 +450,44 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Продленная подписка
         """
-        subscription = await self.get_by_id_or_fail(subscription_id)
-
-        # Новая дата окончания
-        new_expires_at = subscription.expires_at + timedelta(days=additional_days)
-        subscription.expires_at = new_expires_at
-
-        if subscription.is_auto_renew:
-            subscription.next_payment_date = new_expires_at
+        period = timedelta(days=additional_days)
 
+        # Пользователь обновляется в CTE того же запроса: одно обращение к БД
+        # вместо выборки подписки, UPDATE пользователя и UPDATE подписки.
+        # CTE видит подписку до изменения, поэтому дата считается одинаково
+        current = aliased(Subscription)
+        user_update = update(User).where(
+            and_(
+                current.id == subscription_id,
+                User.id == current.user_id
+            )
+        ).values(
+            subscription_expires_at=current.expires_at + period
+        ).cte("user_update")
+
+        values = {
+            "expires_at": Subscription.expires_at + period,
+            "next_payment_date": case(
+                (Subscription.is_auto_renew == True, Subscription.expires_at + period),
+                else_=Subscription.next_payment_date
+            )
+        }
         # Обновляем платеж если указан
         if payment_id:
-            subscription.payment_id = payment_id
+            values["payment_id"] = payment_id
 
-        # Обновляем пользователя
-        user_update = update(User).where(
-            User.id == subscription.user_id
-        ).values(
-            subscription_expires_at=new_expires_at
-        )
-        await self.session.execute(user_update)
+        stmt = update(Subscription).where(
+            Subscription.id == subscription_id
+        ).values(**values).returning(Subscription).add_cte(
+            user_update
+        ).execution_options(populate_existing=True)
+
+        subscription = (await self.session.execute(stmt)).scalar_one_or_none()
+        if subscription is None:
+            raise EntityNotFoundError("Subscription", subscription_id)
+
+        self._invalidate_active_subscription(subscription.user_id)
 
-        await self.session.flush()
         logger.info(f"Подписка {subscription_id} продлена на {additional_days} дней")
 
         return subscription
@@ -248,32 +509,56 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Отмененная подписка
         """
-        subscription = await self.get_by_id_or_fail(subscription_id)
+        values = {
+            "is_cancelled": True,
+            "cancelled_at": func.now(),
+            "is_auto_renew": False,
+            "next_payment_date": None
+        }
 
-        if subscription.is_cancelled:
-            raise InvalidStateTransitionError(
-                "Подписка уже отменена",
-                current_state="cancelled"
+        # Условие is_cancelled = false делает повторную отмену пустым UPDATE
+        # без предварительной выборки подписки
+        stmt = update(Subscription).where(
+            and_(
+                Subscription.id == subscription_id,
+                Subscription.is_cancelled == False
             )
-
-        subscription.is_cancelled = True
-        subscription.cancelled_at = datetime.utcnow()
-        subscription.is_auto_renew = False
-        subscription.next_payment_date = None
+        )
 
         if immediate:
-            subscription.expires_at = datetime.utcnow()
+            values["expires_at"] = func.now()
 
-            # Обновляем пользователя на FREE
+            # Пользователь переводится на FREE в CTE того же запроса
+            current = aliased(Subscription)
             user_update = update(User).where(
-                User.id == subscription.user_id
+                and_(
+                    current.id == subscription_id,
+                    current.is_cancelled == False,
+                    User.id == current.user_id
+                )
             ).values(
                 subscription_tier=SubscriptionTier.FREE,
                 subscription_expires_at=None
+            ).cte("user_update")
+            stmt = stmt.add_cte(user_update)
+
+        stmt = stmt.values(**values).returning(Subscription).execution_options(
+            populate_existing=True
+        )
+
+        subscription = (await self.session.execute(stmt)).scalar_one_or_none()
+
+        if subscription is None:
+            # Ошибочный путь: уточняем, отменена подписка или не существует
+            if await self.session.get(Subscription, subscription_id) is None:
+                raise EntityNotFoundError("Subscription", subscription_id)
+            raise InvalidStateTransitionError(
+                "Подписка уже отменена",
+                current_state="cancelled"
             )
-            await self.session.execute(user_update)
 
-        await self.session.flush()
+        self._invalidate_active_subscription(subscription.user_id)
+
         logger.info(f"Подписка {subscription_id} отменена{' немедленно' if immediate else ''}")
 
         return subscription
@@ -356,6 +641,68 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
 
         return payment
 
+    async def bulk_create_payments(
+            self,
+            records: List[Dict[str, Any]]
+    ) -> int:
+        """
+        Массовое создание платежей.
+
+        Небольшие пачки вставляются одним INSERT с несколькими строками
+        VALUES, пачки от PAYMENT_COPY_THRESHOLD записей - через протокол
+        COPY asyncpg на соединении текущей транзакции.
+
+        Args:
+            records: Словари с полями user_id, amount, provider,
+                subscription_tier, subscription_period_days и необязательными
+                currency, status, payment_method_id
+
+        Returns:
+            Количество созданных платежей
+        """
+        if not records:
+            return 0
+
+        rows = [
+            (
+                uuid4(),
+                record["user_id"],
+                record["amount"],
+                record.get("currency", "RUB"),
+                PaymentStatus(record.get("status", PaymentStatus.PENDING)),
+                PaymentProvider(record["provider"]),
+                SubscriptionTier(record["subscription_tier"]),
+                record["subscription_period_days"],
+                record.get("payment_method_id")
+            )
+            for record in records
+        ]
+
+        if len(rows) >= PAYMENT_COPY_THRESHOLD:
+            # COPY идет мимо типов SQLAlchemy: нативные ENUM платежей
+            # хранят имена элементов, как их записывает SQLEnum
+            copy_rows = [
+                tuple(value.name if isinstance(value, Enum) else value for value in row)
+                for row in rows
+            ]
+            connection = await self.session.connection()
+            raw_connection = await connection.get_raw_connection()
+            await raw_connection.driver_connection.copy_records_to_table(
+                Payment.__tablename__,
+                records=copy_rows,
+                columns=_PAYMENT_BULK_COLUMNS
+            )
+        else:
+            await self.session.execute(
+                insert(Payment).values(
+                    [dict(zip(_PAYMENT_BULK_COLUMNS, row)) for row in rows]
+                )
+            )
+
+        logger.info(f"Создано {len(rows)} платежей")
+
+        return len(rows)
+
     async def update_payment_status(
             self,
             payment_id: int,
@@ -379,7 +726,10 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Обновленный платеж
         """
-        payment = await self._get_payment_by_id(payment_id)
+        # Строка платежа блокируется до конца транзакции: повторный webhook
+        # ждет фиксации первого и видит уже SUCCEEDED, поэтому подписка не
+        # выдается дважды (без повышения уровня изоляции до SERIALIZABLE)
+        payment = await self._get_payment_by_id(payment_id, for_update=True)
 
         # Проверка валидности перехода статуса
         if payment.status == PaymentStatus.SUCCEEDED:
@@ -416,10 +766,24 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
 
         return payment
 
-    async def _get_payment_by_id(self, payment_id: int) -> Payment:
-        """Получение платежа по ID с проверкой."""
-        query = select(Payment).where(Payment.id == payment_id)
-        result = await self.session.execute(query)
+    async def _get_payment_by_id(
+            self,
+            payment_id: int,
+            for_update: bool = False
+    ) -> Payment:
+        """
+        Получение платежа по ID с проверкой.
+
+        Args:
+            payment_id: ID платежа
+            for_update: Заблокировать строку (SELECT ... FOR UPDATE) и
+                перечитать ее, даже если платеж уже загружен в сессию
+
+        Returns:
+            Платеж
+        """
+        query = _PAYMENT_BY_ID_FOR_UPDATE_STMT if for_update else _PAYMENT_BY_ID_STMT
+        result = await self.session.execute(query, {"payment_id": payment_id})
         payment = result.scalar_one_or_none()
 
         if not payment:
@@ -438,8 +802,11 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Args:
             payment: Успешный платеж
         """
-        # Проверяем существующую подписку
-        existing = await self.get_user_active_subscription(payment.user_id)
+        # Решение о продлении принимается по данным БД, а не по кэшу:
+        # устаревшая запись привела бы к продлению уже отмененной подписки
+        existing = await self.get_active_subscription_summary(
+            payment.user_id, use_cache=False
+        )
 
         if existing and existing.tier == payment.subscription_tier:
             # Продлеваем существующую
@@ -488,9 +855,14 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
             user_id: int,
             status: Optional[PaymentStatus] = None,
             pagination: Optional[Pagination] = None
-    ) -> List[Payment]:
+    ) -> Page[Payment]:
         """
-        Получение платежей пользователя.
+        Получение платежей пользователя (новые первые).
+
+        Если в pagination передан курсор after (next_cursor предыдущей
+        страницы), используется keyset-пагинация: страница читается по
+        индексу pay_user_created_id без пропуска OFFSET строк. Иначе
+        страница выбирается по номеру.
 
         Args:
             user_id: ID пользователя
@@ -498,21 +870,57 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
             pagination: Параметры пагинации
 
         Returns:
-            Список платежей
+            Страница платежей с курсором следующей страницы
+        """
+        query = self._apply_pagination(
+            self._user_payments_query(user_id, status),
+            pagination,
+            [Payment.created_at, Payment.id]
+        )
+
+        result = await self.session.scalars(query)
+        return self._keyset_page(list(result.all()), pagination, ['created_at', 'id'])
+
+    async def iter_user_payments(
+            self,
+            user_id: int,
+            status: Optional[PaymentStatus] = None,
+            batch_size: int = 100
+    ) -> AsyncIterator[Payment]:
+        """
+        Потоковый обход платежей пользователя.
+
+        Платежи читаются с сервера пачками по batch_size, поэтому вся
+        история не материализуется в памяти (выгрузки, отчеты).
+
+        Args:
+            user_id: ID пользователя
+            status: Фильтр по статусу
+            batch_size: Размер пачки при чтении
+
+        Yields:
+            Платежи от новых к старым
         """
+        query = self._user_payments_query(user_id, status)
+
+        result = await self.session.stream_scalars(
+            query.execution_options(yield_per=batch_size)
+        )
+        async for payment in result:
+            yield payment
+
+    def _user_payments_query(
+            self,
+            user_id: int,
+            status: Optional[PaymentStatus] = None
+    ) -> Select:
+        """Запрос платежей пользователя от новых к старым."""
         query = select(Payment).where(Payment.user_id == user_id)
 
         if status:
             query = query.where(Payment.status == status)
 
-        query = query.order_by(Payment.created_at.desc())
-
-        if pagination:
-            offset = (pagination.page - 1) * pagination.size
-            query = query.offset(offset).limit(pagination.size)
-
-        result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return query.order_by(Payment.created_at.desc(), Payment.id.desc())
 
     # Работа с промокодами
 
@@ -526,11 +934,9 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Найденный промокод или None
         """
-        query = select(PromoCode).where(
-            PromoCode.code == code.upper().strip()
+        result = await self.session.execute(
+            _PROMO_CODE_STMT, {"code": code.upper().strip()}
         )
-
-        result = await self.session.execute(query)
         return result.scalar_one_or_none()
 
     async def validate_promo_code(
@@ -552,28 +958,48 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Кортеж (валиден, сообщение_об_ошибке)
         """
-        promo = await self.get_promo_code(code)
-
-        if not promo:
-            return False, "Промокод не найден"
+        # Использования пользователем: читается не больше max_uses_per_user
+        # строк, этого достаточно для проверки лимита
+        user_promo_uses = select(Subscription.id).join(
+            Payment,
+            Payment.id == Subscription.payment_id
+        ).where(
+            and_(
+                Payment.user_id == user_id,
+                Subscription.promo_code_id == PromoCode.id
+            )
+        ).correlate(PromoCode).limit(PromoCode.max_uses_per_user).subquery()
+
+        user_uses = select(func.count()).select_from(
+            user_promo_uses
+        ).scalar_subquery()
+
+        # Проверки состояния промокода выполняются в том же запросе
+        state = case(
+            (PromoCode.is_active == False, 'inactive'),
+            (PromoCode.valid_from > func.now(), 'not_started'),
+            (PromoCode.valid_until < func.now(), 'expired'),
+            (and_(
+                PromoCode.max_uses.isnot(None),
+                PromoCode.used_count >= PromoCode.max_uses
+            ), 'exhausted'),
+            else_='ok'
+        )
 
-        if not promo.is_active:
-            return False, "Промокод неактивен"
+        query = select(PromoCode, user_uses, state).where(
+            PromoCode.code == code.upper().strip()
+        )
 
-        # Проверка периода действия
-        now = datetime.utcnow()
-        if promo.valid_from > now:
-            return False, "Промокод еще не активен"
+        row = (await self.session.execute(query)).one_or_none()
+        if row is None:
+            return False, "Промокод не найден"
 
-        if promo.valid_until and promo.valid_until < now:
-            return False, "Промокод истек"
+        promo, user_uses, state = row
 
-        # Проверка лимита использований
-        if promo.max_uses and promo.used_count >= promo.max_uses:
-            return False, "Промокод исчерпан"
+        if state != 'ok':
+            return False, _PROMO_STATE_ERRORS[state]
 
         # Проверка использований пользователем
-        user_uses = await self._count_user_promo_uses(user_id, promo.id)
         if user_uses >= promo.max_uses_per_user:
             return False, f"Вы уже использовали этот промокод {user_uses} раз(а)"
 
@@ -588,25 +1014,6 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
 
         return True, None
 
-    async def _count_user_promo_uses(
-            self,
-            user_id: int,
-            promo_code_id: int
-    ) -> int:
-        """Подсчет использований промокода пользователем."""
-        query = select(func.count(Payment.id)).join(
-            Subscription,
-            Payment.id == Subscription.payment_id
-        ).where(
-            and_(
-                Payment.user_id == user_id,
-                Subscription.promo_code_id == promo_code_id
-            )
-        )
-
-        result = await self.session.execute(query)
-        return result.scalar() or 0
-
     async def apply_promo_code(
             self,
             promo_code_id: int,
@@ -622,21 +1029,45 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Кортеж (скидка, финальная_сумма)
         """
-        promo = await self.get_by_id_or_fail(promo_code_id)
+        # Счетчик увеличивается атомарно в БД: блокировка строки на время
+        # UPDATE упорядочивает одновременные применения, а условие на
+        # max_uses не дает превысить лимит между проверкой и применением
+        stmt = update(PromoCode).where(
+            and_(
+                PromoCode.id == promo_code_id,
+                or_(
+                    PromoCode.max_uses.is_(None),
+                    PromoCode.used_count < PromoCode.max_uses
+                )
+            )
+        ).values(
+            used_count=PromoCode.used_count + 1
+        ).returning(
+            PromoCode.code,
+            PromoCode.type,
+            PromoCode.discount_percent,
+            PromoCode.discount_amount
+        )
+
+        row = (await self.session.execute(stmt)).one_or_none()
+        if row is None:
+            raise BusinessLogicError(
+                "Промокод не найден или исчерпан",
+                details={"promo_code_id": promo_code_id}
+            )
+
+        code, promo_type, discount_percent, discount_amount = row
 
         discount = Decimal(0)
 
-        if promo.type == PromoCodeType.PERCENTAGE:
-            discount = original_amount * Decimal(promo.discount_percent) / 100
-        elif promo.type == PromoCodeType.FIXED:
-            discount = min(promo.discount_amount, original_amount)
+        if promo_type == PromoCodeType.PERCENTAGE:
+            discount = original_amount * Decimal(discount_percent) / 100
+        elif promo_type == PromoCodeType.FIXED:
+            discount = min(discount_amount, original_amount)
 
         final_amount = max(original_amount - discount, Decimal(0))
 
-        # Увеличиваем счетчик использований
-        promo.used_count += 1
-
-        logger.info(f"Применен промокод {promo.code}: скидка {discount} RUB")
+        logger.info(f"Применен промокод {code}: скидка {discount} RUB")
 
         return discount, final_amount
 
@@ -693,6 +1124,89 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
 
         return promo
 
+    async def bulk_create_promo_codes(
+            self,
+            count: int,
+            type: PromoCodeType = PromoCodeType.PERCENTAGE,
+            discount_percent: Optional[int] = None,
+            discount_amount: Optional[Decimal] = None,
+            trial_days: Optional[int] = None,
+            max_uses: Optional[int] = None,
+            valid_days: int = 30,
+            applicable_tiers: Optional[List[str]] = None,
+            description: Optional[str] = None,
+            code_length: int = 8
+    ) -> List[str]:
+        """
+        Массовое создание промокодов с одинаковыми условиями.
+
+        Коды генерируются на стороне БД, и все записи вставляются одним
+        INSERT ... SELECT FROM generate_series. Коды, совпавшие с уже
+        существующими, пропускаются (ON CONFLICT DO NOTHING), поэтому
+        создано может быть немного меньше count.
+
+        Args:
+            count: Количество промокодов
+            type: Тип промокода
+            discount_percent: Процент скидки
+            discount_amount: Сумма скидки
+            trial_days: Дни триала
+            max_uses: Максимум использований каждого кода
+            valid_days: Срок действия в днях
+            applicable_tiers: Применимые тарифы
+            description: Описание
+            code_length: Длина кода (до 32 символов)
+
+        Returns:
+            Список созданных кодов
+        """
+        if count <= 0:
+            return []
+
+        now = datetime.utcnow()
+        columns = PromoCode.__table__.c
+
+        # upper(substr(md5(gen_random_uuid()::text), 1, N)): A-F0-9.
+        # gen_random_uuid() берет байты из криптостойкого генератора,
+        # в отличие от random(), поэтому коды нельзя предсказать.
+        code = func.upper(func.substr(
+            func.md5(cast(func.gen_random_uuid(), Text)),
+            1,
+            code_length
+        ))
+
+        source = select(
+            code,
+            literal(type, columns.type.type),
+            literal(discount_percent, columns.discount_percent.type),
+            literal(discount_amount, columns.discount_amount.type),
+            literal(trial_days, columns.trial_days.type),
+            literal(max_uses, columns.max_uses.type),
+            literal(now, columns.valid_from.type),
+            literal(now + timedelta(days=valid_days), columns.valid_until.type),
+            literal(applicable_tiers, columns.applicable_tiers.type),
+            literal(description, columns.description.type)
+        ).select_from(
+            func.generate_series(1, count).table_valued('n')
+        )
+
+        stmt = pg_insert(PromoCode).from_select(
+            [
+                'code', 'type', 'discount_percent', 'discount_amount',
+                'trial_days', 'max_uses', 'valid_from', 'valid_until',
+                'applicable_tiers', 'description'
+            ],
+            source
+        ).on_conflict_do_nothing(
+            index_elements=['code']
+        ).returning(PromoCode.code)
+
+        codes = list((await self.session.execute(stmt)).scalars().all())
+
+        logger.info(f"Создано промокодов: {len(codes)} из {count} (тип {type.value})")
+
+        return codes
+
     # Управление способами оплаты
 
     async def save_payment_method(
@@ -718,71 +1232,54 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Сохраненный способ оплаты
         """
-        # Проверяем существование
-        existing = await self._get_payment_method(
-            user_id, provider, provider_method_id
-        )
-
-        if existing:
-            # Обновляем существующий
-            existing.is_active = True
-            if is_default:
-                await self._set_default_payment_method(user_id, existing.id)
-            return existing
+        # Один INSERT ... ON CONFLICT вместо проверки существования:
+        # существующий способ оплаты снова становится активным
+        conflict_set = {'is_active': True}
+        if is_default:
+            conflict_set['is_default'] = True
 
-        # Создаем новый
-        payment_method = PaymentMethod(
+        stmt = pg_insert(PaymentMethod).values(
             user_id=user_id,
             provider=provider,
             provider_method_id=provider_method_id,
             card_last4=card_last4,
             card_brand=card_brand,
             is_default=is_default
+        ).on_conflict_do_update(
+            index_elements=['user_id', 'provider', 'provider_method_id'],
+            set_=conflict_set
         )
 
-        self.session.add(payment_method)
-
         if is_default:
-            await self._set_default_payment_method(user_id, payment_method.id)
-
-        await self.session.flush()
-        logger.info(f"Сохранен способ оплаты для пользователя {user_id}")
-
-        return payment_method
-
-    async def _get_payment_method(
-            self,
-            user_id: int,
-            provider: PaymentProvider,
-            provider_method_id: str
-    ) -> Optional[PaymentMethod]:
-        """Получение способа оплаты по уникальным полям."""
-        query = select(PaymentMethod).where(
-            and_(
-                PaymentMethod.user_id == user_id,
-                PaymentMethod.provider == provider,
-                PaymentMethod.provider_method_id == provider_method_id
+            # Блокировка строки пользователя упорядочивает параллельные
+            # сохранения основного способа оплаты: второй запрос ждет
+            # фиксации первого и видит его строку в своем снимке
+            await self.session.execute(
+                select(User.id).where(User.id == user_id).with_for_update()
             )
-        )
 
-        result = await self.session.execute(query)
-        return result.scalar_one_or_none()
+            # Сброс прежнего основного способа в CTE того же запроса.
+            # Сохраняемая строка исключается по ключу, а не по id, поэтому
+            # CTE не зависит от результата INSERT
+            clear_default = update(PaymentMethod).where(
+                and_(
+                    PaymentMethod.user_id == user_id,
+                    PaymentMethod.is_default == True,
+                    or_(
+                        PaymentMethod.provider != provider,
+                        PaymentMethod.provider_method_id != provider_method_id
+                    )
+                )
+            ).values(is_default=False).cte("clear_default")
+            stmt = stmt.add_cte(clear_default)
+
+        stmt = stmt.returning(PaymentMethod).execution_options(populate_existing=True)
+
+        payment_method = (await self.session.execute(stmt)).scalar_one()
 
-    async def _set_default_payment_method(
-            self,
-            user_id: int,
-            method_id: int
-    ) -> None:
-        """Установка способа оплаты по умолчанию."""
-        # Сбрасываем текущий default
-        reset_query = update(PaymentMethod).where(
-            and_(
-                PaymentMethod.user_id == user_id,
-                PaymentMethod.id != method_id
-            )
-        ).values(is_default=False)
+        logger.info(f"Сохранен способ оплаты для пользователя {user_id}")
 
-        await self.session.execute(reset_query)
+        return payment_method
 
     async def get_user_payment_methods(
             self,
@@ -831,62 +1328,69 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Словарь со статистикой
         """
-        # Базовый запрос для успешных платежей
-        base_query = select(Payment).where(
+        # Сумма по тарифам и общий итог за один проход:
+        # GROUPING SETS((tier), ()) дает строку на тариф и строку итога
+        revenue = select(
+            _tier_value(Payment.subscription_tier).label("tier"),
+            func.grouping(Payment.subscription_tier).label("is_total"),
+            func.count(Payment.id).label("count"),
+            func.coalesce(func.sum(Payment.amount), 0).label("amount")
+        ).where(
             Payment.status == PaymentStatus.SUCCEEDED
+        ).group_by(
+            func.grouping_sets(tuple_(Payment.subscription_tier), tuple_())
         )
 
         if start_date:
-            base_query = base_query.where(Payment.paid_at >= start_date)
+            revenue = revenue.where(Payment.paid_at >= start_date)
         if end_date:
-            base_query = base_query.where(Payment.paid_at <= end_date)
+            revenue = revenue.where(Payment.paid_at <= end_date)
 
-        # Общая сумма
-        total_query = select(func.sum(Payment.amount)).select_from(
-            base_query.subquery()
-        )
-        total_result = await self.session.execute(total_query)
-        total_revenue = total_result.scalar() or Decimal(0)
+        revenue = revenue.subquery("revenue")
 
-        # По тарифам
-        by_tier_query = select(
-            Payment.subscription_tier,
-            func.count(Payment.id),
-            func.sum(Payment.amount)
-        ).where(
-            Payment.status == PaymentStatus.SUCCEEDED
-        ).group_by(Payment.subscription_tier)
-
-        if start_date:
-            by_tier_query = by_tier_query.where(Payment.paid_at >= start_date)
-        if end_date:
-            by_tier_query = by_tier_query.where(Payment.paid_at <= end_date)
-
-        by_tier_result = await self.session.execute(by_tier_query)
-
-        revenue_by_tier = {}
-        for tier, count, amount in by_tier_result:
-            revenue_by_tier[tier.value] = {
-                "count": count,
-                "amount": float(amount or 0)
-            }
-
-        # Количество активных подписок
-        active_subs_query = select(
-            Subscription.tier,
-            func.count(Subscription.id)
+        # Количество активных подписок по тарифам
+        active_subs = select(
+            _tier_value(Subscription.tier).label("tier"),
+            func.count(Subscription.id).label("count")
         ).where(
             and_(
-                Subscription.expires_at > datetime.utcnow(),
+                Subscription.expires_at > func.now(),
                 Subscription.is_cancelled == False
             )
-        ).group_by(Subscription.tier)
-
-        active_subs_result = await self.session.execute(active_subs_query)
+        ).group_by(Subscription.tier).subquery("active_subs")
+
+        # Словари собираются в БД через json_object_agg: клиент получает
+        # одну строку вместо строки на каждую группу
+        empty = func.json_build_object(type_=JSON)
+        stats_query = select(
+            func.coalesce(
+                func.max(revenue.c.amount).filter(revenue.c.is_total == 1),
+                0
+            ),
+            func.coalesce(
+                func.json_object_agg(
+                    revenue.c.tier,
+                    func.json_build_object(
+                        "count", revenue.c.count,
+                        "amount", cast(revenue.c.amount, Float)
+                    ),
+                    type_=JSON
+                ).filter(revenue.c.is_total == 0),
+                empty
+            ),
+            func.coalesce(
+                select(
+                    func.json_object_agg(
+                        active_subs.c.tier, active_subs.c.count, type_=JSON
+                    )
+                ).scalar_subquery(),
+                empty
+            )
+        ).select_from(revenue)
 
-        active_subscriptions = {}
-        for tier, count in active_subs_result:
-            active_subscriptions[tier.value] = count
+        total_revenue, revenue_by_tier, active_subscriptions = (
+            await self.session.execute(stats_query)
+        ).one()
 
         return {
             "total_revenue": float(total_revenue),
@@ -911,12 +1415,12 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
         Returns:
             Список истекающих подписок
         """
-        expiry_date = datetime.utcnow() + timedelta(days=days_ahead)
+        expiry_date = func.now() + timedelta(days=days_ahead)
 
         query = select(Subscription).where(
             and_(
                 Subscription.expires_at <= expiry_date,
-                Subscription.expires_at > datetime.utcnow(),
+                Subscription.expires_at > func.now(),
                 Subscription.is_cancelled == False,
                 Subscription.is_auto_renew == False
             )
@@ -938,11 +1442,96 @@ class SubscriptionRepository(BaseRepository[Subscription], ISubscriptionReposito
             and_(
                 Subscription.is_auto_renew == True,
                 Subscription.is_cancelled == False,
-                Subscription.next_payment_date <= datetime.utcnow()
+                Subscription.next_payment_date <= func.now()
             )
         ).options(
-            selectinload(Subscription.user)
+            # many-to-one: пользователь приходит в том же запросе через JOIN
+            joinedload(Subscription.user)
         )
 
         result = await self.session.execute(query)
-        return list(result.scalars().all())
\ No newline at end of file
+        return list(result.scalars().all())
+
+    async def bulk_renew(
+            self,
+            subscription_ids: List[int],
+            period_days: Optional[int] = None
+    ) -> List[int]:
+        """
+        Создание платежей автопродления для пачки подписок.
+
+        Платежи создаются одним INSERT ... SELECT по последнему платежу
+        каждой подписки (сумма, провайдер, способ оплаты), затем одним
+        UPDATE переносится next_payment_date, чтобы следующий запуск не
+        создал платеж повторно. Подписки без payment_id пропускаются:
+        платеж для них не создается, дата не переносится, их ID пишутся
+        в лог. Срок подписки продлевается при успешной оплате
+        (см. update_payment_status).
+
+        Args:
+            subscription_ids: ID подписок для продления
+            period_days: Период продления (по умолчанию - как в прошлом платеже)
+
+        Returns:
+            ID созданных платежей в статусе PENDING
+        """
+        if not subscription_ids:
+            return []
+
+        period = (
+            literal(period_days) if period_days
+            else Payment.subscription_period_days
+        )
+
+        source = select(
+            func.gen_random_uuid(),
+            Payment.user_id,
+            Payment.amount,
+            Payment.currency,
+            literal(PaymentStatus.PENDING, Payment.__table__.c.status.type),
+            Payment.provider,
+            Payment.subscription_tier,
+            period,
+            Payment.payment_method_id
+        ).join(
+            Subscription,
+            Subscription.payment_id == Payment.id
+        ).where(
+            Subscription.id.in_(subscription_ids)
+        )
+
+        insert_stmt = insert(Payment).from_select(
+            [
+                'uuid', 'user_id', 'amount', 'currency', 'status', 'provider',
+                'subscription_tier', 'subscription_period_days', 'payment_method_id'
+            ],
+            source
+        ).returning(Payment.id)
+        payment_ids = list((await self.session.execute(insert_stmt)).scalars().all())
+
+        # Переносим дату только тем подпискам, для которых платеж создан:
+        # без исходного платежа продлевать нечего, и такие подписки должны
+        # остаться видимыми для следующего запуска и разбора.
+        postpone_stmt = update(Subscription).where(
+            Subscription.id.in_(subscription_ids),
+            Subscription.payment_id.isnot(None)
+        ).values(
+            next_payment_date=datetime.utcnow() + RENEWAL_RETRY_INTERVAL
+        ).returning(Subscription.id)
+        renewed_ids = set(
+            (await self.session.execute(postpone_stmt)).scalars().all()
+        )
+
+        skipped_ids = [sid for sid in subscription_ids if sid not in renewed_ids]
+        if skipped_ids:
+            logger.warning(
+                f"Подписки без исходного платежа пропущены при автопродлении: "
+                f"{skipped_ids}"
+            )
+
+        logger.info(
+            f"Созданы платежи автопродления: {len(payment_ids)} "
+            f"для {len(subscription_ids)} подписок"
+        )
+
+        return payment_ids
\ No newline at end of file
@@ -9,14 +9,21 @@
 - Поиск и фильтрацию раскладов
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Tuple, Final, Mapping
 from datetime import datetime, date, timedelta
+from types import MappingProxyType
+import asyncio
 import random
 import json
 
-from sqlalchemy import select, func, and_, or_, update, desc, asc
+from sqlalchemy import (
+    select, insert, func, and_, or_, update, desc, asc, text, column, Integer,
+    event, case, exists, literal, inspect
+)
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import joinedload, make_transient_to_detached, object_session
+from sqlalchemy.orm.attributes import set_committed_value
 
 from config import logger, SubscriptionTier, ReadingType
 from core.interfaces.repository import (
@@ -24,14 +31,43 @@ from core.interfaces.repository import (
 )
 from infrastructure.database.models import (
     TarotDeck, TarotCard, TarotSpread, TarotReading,
-    SavedReading, CardType, User
+    SavedReading, PopularSpread, CardType, User
 )
-from infrastructure.database.repositories.base import BaseRepository
+from infrastructure.database.models.user import DAILY_READINGS_LIMITS
+from infrastructure.database.repositories.base import BaseRepository, AFTER_COMMIT_KEY
 from core.exceptions import (
     EntityNotFoundError, ValidationError,
     SubscriptionRequiredError, DailyLimitReachedError
 )
 
+# Тип расклада по коду (только для чтения, строится один раз при импорте)
+_SPREAD_CODE_TO_TYPE: Final[Mapping[str, ReadingType]] = MappingProxyType({
+    "card_of_day": ReadingType.CARD_OF_DAY,
+    "three_cards": ReadingType.THREE_CARDS,
+    "celtic_cross": ReadingType.CELTIC_CROSS,
+    "relationship": ReadingType.RELATIONSHIP,
+    "career": ReadingType.CAREER,
+    "yes_no": ReadingType.YES_NO
+})
+
+
+def _detached_copy(card: TarotCard) -> TarotCard:
+    """
+    Отсоединенная копия карты со значениями всех колонок.
+
+    Args:
+        card: Карта, принадлежащая сессии
+
+    Returns:
+        Копия карты, не привязанная ни к одной сессии
+    """
+    mapper = inspect(TarotCard)
+    copy = mapper.class_manager.new_instance()
+    for attr in mapper.column_attrs:
+        set_committed_value(copy, attr.key, getattr(card, attr.key))
+    make_transient_to_detached(copy)
+    return copy
+
 
 class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
     """
@@ -40,6 +76,14 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
     Управляет картами, раскладами и историей чтений.
     """
 
+    # Кэш карт колод на процесс: (deck_id, card_type) -> карты.
+    # Карты - справочные данные. Изменения через ORM в этом процессе
+    # сбрасывают кэш сами (см. _invalidate_deck_on_card_change); после
+    # правки карт SQL-скриптом или в другом процессе вызовите
+    # invalidate_deck или перезапустите бота
+    _CARDS_CACHE: Dict[Tuple[int, Optional[str]], List[TarotCard]] = {}
+    _CARDS_LOCK = asyncio.Lock()
+
     def __init__(self, session: AsyncSession):
         """
         Инициализация репозитория Таро.
@@ -48,7 +92,21 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             session: Сессия БД
         """
         super().__init__(session, TarotReading)
-        self._cards_cache: Optional[Dict[int, List[TarotCard]]] = None
+
+    @classmethod
+    def invalidate_deck(cls, deck_id: Optional[int] = None) -> None:
+        """
+        Сброс кэша карт колоды (после изменения карт).
+
+        Args:
+            deck_id: ID колоды (None - сбросить кэш всех колод)
+        """
+        if deck_id is None:
+            cls._CARDS_CACHE.clear()
+            return
+
+        for key in [key for key in cls._CARDS_CACHE if key[0] == deck_id]:
+            del cls._CARDS_CACHE[key]
 
     # Работа с колодами и картами
 
@@ -122,10 +180,13 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             card_type: Тип карт (опционально)
 
         Returns:
-            Список карт
+            Список карт (общий для всех вызовов, не изменять)
         """
         # Проверяем кэш
-        cache_key = f"{deck_id}:{card_type.value if card_type else 'all'}"
+        cache_key = (deck_id, card_type.value if card_type else None)
+        cards = self._CARDS_CACHE.get(cache_key)
+        if cards is not None:
+            return cards
 
         query = select(TarotCard).where(TarotCard.deck_id == deck_id)
 
@@ -134,12 +195,67 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
 
         query = query.order_by(TarotCard.card_number)
 
-        result = await self.session.execute(query)
-        cards = list(result.scalars().all())
+        # Одновременные промахи по одной колоде не должны все идти в БД:
+        # после получения блокировки кэш проверяется повторно
+        async with self._CARDS_LOCK:
+            cards = self._CARDS_CACHE.get(cache_key)
+            if cards is not None:
+                return cards
+
+            # Карты, которые уже были в сессии вызывающего кода до запроса,
+            # из нее не убираем: в кэш кладутся их отсоединенные копии
+            held = {
+                key for key in self.session.identity_map.keys()
+                if key[0] is TarotCard
+            }
+
+            result = await self.session.execute(query)
+            cards = list(result.scalars().all())
+
+            # Отсоединяем карты: после commit/закрытия сессии их поля не
+            # истекают. Отношения у закэшированных карт не загружаются
+            for i, card in enumerate(cards):
+                if inspect(card).identity_key in held:
+                    cards[i] = _detached_copy(card)
+                else:
+                    self.session.expunge(card)
+
+            self._CARDS_CACHE[cache_key] = cards
 
-        logger.debug(f"Получено {len(cards)} карт из колоды {deck_id}")
+        logger.debug("Получено %d карт из колоды %s", len(cards), deck_id)
         return cards
 
+    async def _get_cards_by_ids(self, card_ids: List[int]) -> Dict[int, TarotCard]:
+        """
+        Получение карт по ID с использованием кэша карт колод.
+
+        Карты ищутся в уже загруженных колодах, запрос к БД выполняется
+        только для отсутствующих в кэше.
+
+        Args:
+            card_ids: ID карт
+
+        Returns:
+            Словарь ID карты -> карта
+        """
+        wanted = set(card_ids)
+        cards_dict = {}
+
+        for (_, card_type), cards in self._CARDS_CACHE.items():
+            if card_type is not None:
+                continue
+            for card in cards:
+                if card.id in wanted:
+                    cards_dict[card.id] = card
+
+        missing = wanted - cards_dict.keys()
+        if missing:
+            cards_query = select(TarotCard).where(TarotCard.id.in_(missing))
+            cards_result = await self.session.execute(cards_query)
+            cards_dict.update((card.id, card) for card in cards_result.scalars())
+
+        return cards_dict
+
     async def get_card_by_id(self, card_id: int) -> Optional[TarotCard]:
         """
         Получение карты по ID.
@@ -233,16 +349,188 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             ValidationError: При ошибке валидации
             SubscriptionRequiredError: Для премиум раскладов
         """
-        # Получаем пользователя
-        user_query = select(User).where(User.id == user_id)
-        user_result = await self.session.execute(user_query)
-        user = user_result.scalar_one_or_none()
+        _, spread, deck, cards_drawn = await self._prepare_reading(
+            user_id, spread_code, deck_code
+        )
+
+        reading = await self.create(
+            user_id=user_id,
+            spread_id=spread.id,
+            deck_id=deck.id,
+            reading_type=self._get_reading_type(spread_code),
+            question=question,
+            cards_drawn=cards_drawn,
+            context_data=context_data or {}
+        )
+
+        # Увеличиваем счетчик использования расклада
+        spread.usage_count += 1
+
+        logger.info(
+            f"Создан расклад {spread.name} для пользователя {user_id}"
+        )
+
+        return reading
+
+    async def create_reading_with_limit(
+            self,
+            user_id: int,
+            spread_code: str,
+            question: Optional[str] = None,
+            deck_code: str = "rider_waite",
+            context_data: Optional[Dict[str, Any]] = None
+    ) -> TarotReading:
+        """
+        Списание дневного лимита и создание расклада.
+
+        После загрузки пользователя, расклада и колоды (один SELECT)
+        все записи выполняются одним запросом:
+
+            WITH consume_limit AS (UPDATE users ... RETURNING id),
+                 bump_spread AS (UPDATE tarot_spreads ...)
+            INSERT INTO tarot_readings ... SELECT ... FROM consume_limit
+            RETURNING *
+
+        UPDATE users сбрасывает счетчик при наступлении нового дня и
+        проверяет лимит в WHERE. Если лимит исчерпан (в том числе
+        параллельным запросом), CTE не возвращает строку и расклад не
+        вставляется.
+
+        Args:
+            user_id: ID пользователя
+            spread_code: Код типа расклада
+            question: Вопрос пользователя
+            deck_code: Код колоды
+            context_data: Дополнительный контекст
+
+        Returns:
+            Созданный расклад
+
+        Raises:
+            DailyLimitReachedError: При превышении дневного лимита
+            SubscriptionRequiredError: Для премиум раскладов
+        """
+        user, spread, deck, cards_drawn = await self._prepare_reading(
+            user_id, spread_code, deck_code
+        )
+
+        today = date.today()
+        limit = DAILY_READINGS_LIMITS.get(user.subscription_tier, 3)
+        same_day = user.daily_readings_date == today
+
+        # Лимит виден уже по загруженному пользователю: не отправляем запрос
+        if same_day and user.daily_readings_count >= limit:
+            raise DailyLimitReachedError("раскладов", limit, user.daily_readings_count)
+
+        consume_limit = update(User).where(
+            User.id == user_id,
+            or_(
+                User.daily_readings_date.is_distinct_from(today),
+                User.daily_readings_count < limit
+            )
+        ).values(
+            daily_readings_count=case(
+                (User.daily_readings_date == today, User.daily_readings_count + 1),
+                else_=1
+            ),
+            daily_readings_date=today,
+            total_readings=User.total_readings + 1,
+            last_activity_at=func.now()
+        ).returning(User.id).cte('consume_limit')
+
+        bump_spread = update(TarotSpread).where(
+            TarotSpread.id == spread.id,
+            exists(select(consume_limit.c.id))
+        ).values(
+            usage_count=TarotSpread.usage_count + 1
+        ).cte('bump_spread')
+
+        # Данные расклада передаются литералами, cards_drawn собран
+        # _draw_cards и соответствует validate_cards_drawn
+        columns = TarotReading.__table__.c
+        source = select(
+            consume_limit.c.id,
+            literal(spread.id, columns.spread_id.type),
+            literal(deck.id, columns.deck_id.type),
+            literal(self._get_reading_type(spread_code), columns.reading_type.type),
+            literal(question, columns.question.type),
+            literal(cards_drawn, columns.cards_drawn.type),
+            literal(context_data or {}, columns.context_data.type)
+        )
+
+        stmt = insert(TarotReading).from_select(
+            [
+                'user_id', 'spread_id', 'deck_id', 'reading_type',
+                'question', 'cards_drawn', 'context_data'
+            ],
+            source
+        ).add_cte(bump_spread).returning(TarotReading)
+
+        reading = (await self.session.scalars(stmt)).one_or_none()
+
+        if reading is None:
+            raise DailyLimitReachedError("раскладов", limit, limit)
+
+        # Объекты сессии приводим к записанному в БД без повторного SELECT
+        set_committed_value(
+            user, 'daily_readings_count',
+            user.daily_readings_count + 1 if same_day else 1
+        )
+        set_committed_value(user, 'daily_readings_date', today)
+        set_committed_value(user, 'total_readings', user.total_readings + 1)
+        set_committed_value(spread, 'usage_count', spread.usage_count + 1)
+
+        logger.info(
+            f"Создан расклад {spread.name} для пользователя {user_id}"
+        )
+
+        return reading
+
+    async def _prepare_reading(
+            self,
+            user_id: int,
+            spread_code: str,
+            deck_code: str
+    ) -> Tuple[User, TarotSpread, TarotDeck, List[Dict[str, Any]]]:
+        """
+        Загрузка данных для расклада, проверка доступа и выбор карт.
+
+        Args:
+            user_id: ID пользователя
+            spread_code: Код типа расклада
+            deck_code: Код колоды
+
+        Returns:
+            Кортеж (пользователь, расклад, колода, выпавшие карты)
+
+        Raises:
+            EntityNotFoundError: Если пользователь или расклад не найдены
+            SubscriptionRequiredError: Для премиум раскладов
+        """
+        # Пользователь, расклад и колода одним запросом: расклад и колода
+        # присоединяются по коду через LEFT JOIN, поэтому их отсутствие
+        # дает NULL, а не пустой результат
+        prelude = select(User, TarotSpread, TarotDeck).select_from(User).outerjoin(
+            TarotSpread,
+            and_(
+                TarotSpread.code == spread_code,
+                TarotSpread.is_active == True
+            )
+        ).outerjoin(
+            TarotDeck,
+            and_(
+                TarotDeck.code == deck_code,
+                TarotDeck.is_active == True
+            )
+        ).where(User.id == user_id)
+
+        row = (await self.session.execute(prelude)).first()
 
-        if not user:
+        if not row:
             raise EntityNotFoundError(f"Пользователь {user_id} не найден")
 
-        # Получаем тип расклада
-        spread = await self.get_spread_by_code(spread_code)
+        user, spread, deck = row
+
         if not spread:
             raise EntityNotFoundError(f"Расклад {spread_code} не найден")
 
@@ -253,8 +541,7 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
                 required_tier=SubscriptionTier.BASIC
             )
 
-        # Получаем колоду
-        deck = await self.get_deck_by_code(deck_code)
+        # Колода по умолчанию, если запрошенная не найдена
         if not deck:
             deck = await self.get_default_deck()
 
@@ -264,27 +551,7 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             count=spread.card_count
         )
 
-        # Создаем расклад
-        reading_type = self._get_reading_type(spread_code)
-
-        reading = await self.create(
-            user_id=user_id,
-            spread_id=spread.id,
-            deck_id=deck.id,
-            reading_type=reading_type,
-            question=question,
-            cards_drawn=cards_drawn,
-            context_data=context_data or {}
-        )
-
-        # Увеличиваем счетчик использования расклада
-        spread.usage_count += 1
-
-        logger.info(
-            f"Создан расклад {spread.name} для пользователя {user_id}"
-        )
-
-        return reading
+        return user, spread, deck, cards_drawn
 
     async def _draw_cards(
             self,
@@ -309,33 +576,35 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
                 f"Недостаточно карт в колоде: {len(cards)} < {count}"
             )
 
-        # Случайно выбираем карты
-        selected_cards = random.sample(cards, count)
+        # Частичная перетасовка Фишера-Йетса по массиву индексов: список
+        # карт общий (кэш колоды), поэтому сам он не переставляется.
+        # Достаточно count шагов, по одному вызову ГСЧ на карту
+        total = len(cards)
+        indexes = list(range(total))
+        for i in range(count):
+            j = random.randrange(i, total)
+            indexes[i], indexes[j] = indexes[j], indexes[i]
+
+        # Ориентация всех карт одним вызовом ГСЧ: бит i = 1 -> карта i перевернута
+        reversed_bits = random.getrandbits(count)
 
         # Формируем результат
-        cards_drawn = []
-        for position, card in enumerate(selected_cards, 1):
-            cards_drawn.append({
-                "position": position,
+        cards_drawn = [
+            {
+                "position": position + 1,
                 "card_id": card.id,
                 "card_number": card.card_number,
                 "card_name": card.name,
-                "is_reversed": random.choice([True, False])  # 50% шанс
-            })
+                "is_reversed": bool(reversed_bits >> position & 1)  # 50% шанс
+            }
+            for position, card in enumerate(cards[i] for i in indexes[:count])
+        ]
 
         return cards_drawn
 
     def _get_reading_type(self, spread_code: str) -> ReadingType:
         """Определение типа расклада по коду."""
-        mapping = {
-            "card_of_day": ReadingType.CARD_OF_DAY,
-            "three_cards": ReadingType.THREE_CARDS,
-            "celtic_cross": ReadingType.CELTIC_CROSS,
-            "relationship": ReadingType.RELATIONSHIP,
-            "career": ReadingType.CAREER,
-            "yes_no": ReadingType.YES_NO
-        }
-        return mapping.get(spread_code, ReadingType.CUSTOM)
+        return _SPREAD_CODE_TO_TYPE.get(spread_code, ReadingType.CUSTOM)
 
     # Получение раскладов
 
@@ -344,9 +613,13 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             user_id: int,
             reading_type: Optional[ReadingType] = None,
             pagination: Optional[Pagination] = None
-    ) -> List[TarotReading]:
+    ) -> Page[TarotReading]:
         """
-        Получение раскладов пользователя.
+        Получение раскладов пользователя (новые первые).
+
+        Если в pagination передан курсор after (next_cursor предыдущей
+        страницы), используется keyset-пагинация по индексу
+        idx_reading_user_date вместо OFFSET.
 
         Args:
             user_id: ID пользователя
@@ -354,28 +627,33 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             pagination: Параметры пагинации
 
         Returns:
-            Список раскладов
+            Страница раскладов с курсором следующей страницы
         """
         query = select(TarotReading).where(
-            TarotReading.user_id == user_id
+            and_(
+                TarotReading.user_id == user_id,
+                # "= false", а не "IS false": только такое условие
+                # совпадает с предикатом частичного индекса
+                TarotReading.is_deleted == False
+            )
         ).options(
-            selectinload(TarotReading.spread),
-            selectinload(TarotReading.deck)
+            joinedload(TarotReading.spread),
+            joinedload(TarotReading.deck)
         )
 
         if reading_type:
             query = query.where(TarotReading.reading_type == reading_type)
 
         # Сортировка по дате создания (новые первые)
-        query = query.order_by(TarotReading.created_at.desc())
-
-        # Применение пагинации
-        if pagination:
-            offset = (pagination.page - 1) * pagination.size
-            query = query.offset(offset).limit(pagination.size)
+        query = query.order_by(TarotReading.created_at.desc(), TarotReading.id.desc())
+        query = self._apply_pagination(
+            query, pagination, [TarotReading.created_at, TarotReading.id]
+        )
 
         result = await self.session.execute(query)
-        return list(result.scalars().all())
+        return self._keyset_page(
+            list(result.scalars().all()), pagination, ['created_at', 'id']
+        )
 
     async def get_today_reading(
             self,
@@ -401,8 +679,8 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
                 TarotReading.created_at <= today_end
             )
         ).options(
-            selectinload(TarotReading.spread),
-            selectinload(TarotReading.deck)
+            joinedload(TarotReading.spread),
+            joinedload(TarotReading.deck)
         )
 
         result = await self.session.execute(query)
@@ -430,9 +708,12 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
         query = select(TarotReading).where(
             TarotReading.id == reading_id
         ).options(
-            selectinload(TarotReading.spread),
-            selectinload(TarotReading.deck),
-            selectinload(TarotReading.saved_reading)
+            # Все связи - многие-к-одному или один-к-одному: JOIN не
+            # размножает строки и заменяет четыре отдельных запроса
+            joinedload(TarotReading.spread),
+            joinedload(TarotReading.deck),
+            joinedload(TarotReading.saved_reading),
+            joinedload(TarotReading.interpretation)
         )
 
         if user_id:
@@ -448,11 +729,12 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
                 entity_id=reading_id
             )
 
-        # Загружаем полную информацию о картах
-        card_ids = [card['card_id'] for card in reading.cards_drawn]
-        cards_query = select(TarotCard).where(TarotCard.id.in_(card_ids))
-        cards_result = await self.session.execute(cards_query)
-        cards_dict = {card.id: card for card in cards_result.scalars()}
+        # Полная информация только о выпавших картах: из кэша колод, если
+        # они там есть, иначе одним запросом по ID. deck_id не нужен - он
+        # может быть NULL, если колоду удалили
+        cards_dict = await self._get_cards_by_ids(
+            [card_data['card_id'] for card_data in reading.cards_drawn]
+        ) if reading.cards_drawn else {}
 
         # Обогащаем информацию о картах
         for card_data in reading.cards_drawn:
@@ -568,9 +850,12 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             user_id: int,
             tags: Optional[List[str]] = None,
             pagination: Optional[Pagination] = None
-    ) -> List[SavedReading]:
+    ) -> Page[SavedReading]:
         """
-        Получение сохраненных раскладов.
+        Получение сохраненных раскладов (новые первые).
+
+        Курсор after в pagination - next_cursor предыдущей страницы
+        (см. get_user_readings).
 
         Args:
             user_id: ID пользователя
@@ -578,7 +863,7 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             pagination: Параметры пагинации
 
         Returns:
-            Список сохраненных раскладов
+            Страница сохраненных раскладов с курсором следующей страницы
         """
         query = select(SavedReading).where(
             SavedReading.user_id == user_id
@@ -596,15 +881,15 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
                 )
 
         # Сортировка по дате создания
-        query = query.order_by(SavedReading.created_at.desc())
-
-        # Пагинация
-        if pagination:
-            offset = (pagination.page - 1) * pagination.size
-            query = query.offset(offset).limit(pagination.size)
+        query = query.order_by(SavedReading.created_at.desc(), SavedReading.id.desc())
+        query = self._apply_pagination(
+            query, pagination, [SavedReading.created_at, SavedReading.id]
+        )
 
         result = await self.session.execute(query)
-        return list(result.unique().scalars().all())
+        return self._keyset_page(
+            list(result.unique().scalars().all()), pagination, ['created_at', 'id']
+        )
 
     # Статистика
 
@@ -629,42 +914,28 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
             "last_reading_date": None
         }
 
-        # Общее количество раскладов
-        total_query = select(func.count(TarotReading.id)).where(
-            TarotReading.user_id == user_id
-        )
-        total_result = await self.session.execute(total_query)
-        stats["total_readings"] = total_result.scalar() or 0
-
-        # Количество избранных
-        fav_query = select(func.count(TarotReading.id)).where(
-            and_(
-                TarotReading.user_id == user_id,
-                TarotReading.is_favorite == True
-            )
-        )
-        fav_result = await self.session.execute(fav_query)
-        stats["favorite_readings"] = fav_result.scalar() or 0
-
-        # Расклады по типам
+        # Количество, избранные и дата последнего расклада по каждому типу
+        # одним запросом: строк не больше, чем типов раскладов, итоги
+        # складываются из них
         type_query = select(
             TarotReading.reading_type,
-            func.count(TarotReading.id)
+            func.count(TarotReading.id),
+            func.count(TarotReading.id).filter(TarotReading.is_favorite == True),
+            func.max(TarotReading.created_at)
         ).where(
             TarotReading.user_id == user_id
         ).group_by(TarotReading.reading_type)
 
         type_result = await self.session.execute(type_query)
-        for reading_type, count in type_result:
-            stats["readings_by_type"][reading_type.value] = count
 
-        # Последний расклад
-        last_query = select(TarotReading.created_at).where(
-            TarotReading.user_id == user_id
-        ).order_by(TarotReading.created_at.desc()).limit(1)
+        last_date = None
+        for reading_type, count, favorite_count, last_created in type_result:
+            stats["readings_by_type"][reading_type.value] = count
+            stats["total_readings"] += count
+            stats["favorite_readings"] += favorite_count
+            if last_date is None or last_created > last_date:
+                last_date = last_created
 
-        last_result = await self.session.execute(last_query)
-        last_date = last_result.scalar()
         if last_date:
             stats["last_reading_date"] = last_date.isoformat()
 
@@ -688,32 +959,29 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
         Returns:
             Список карт с частотой
         """
-        # Получаем все расклады пользователя
-        readings_query = select(TarotReading.cards_drawn).where(
+        # Частота считается в БД: карты разворачиваются из cards_drawn через
+        # jsonb_array_elements, и клиент получает только топ-limit пар
+        drawn = func.jsonb_array_elements(TarotReading.cards_drawn).table_valued(
+            column("value", JSONB), joins_implicitly=True
+        ).alias("drawn")
+        drawn_card_id = drawn.c.value["card_id"].astext.cast(Integer).label("card_id")
+        drawn_count = func.count().label("count")
+
+        top_query = select(drawn_card_id, drawn_count).select_from(
+            TarotReading, drawn
+        ).where(
             TarotReading.user_id == user_id
-        )
-        readings_result = await self.session.execute(readings_query)
-
-        # Подсчитываем частоту карт
-        card_counts = {}
-        for cards_drawn, in readings_result:
-            for card_data in cards_drawn:
-                card_id = card_data['card_id']
-                card_counts[card_id] = card_counts.get(card_id, 0) + 1
-
-        # Сортируем по частоте
-        top_cards = sorted(
-            card_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:limit]
+        ).group_by(drawn_card_id).order_by(
+            drawn_count.desc(), drawn_card_id
+        ).limit(limit)
+
+        top_cards = (await self.session.execute(top_query)).all()
 
         # Получаем информацию о картах
         if top_cards:
-            card_ids = [card_id for card_id, _ in top_cards]
-            cards_query = select(TarotCard).where(TarotCard.id.in_(card_ids))
-            cards_result = await self.session.execute(cards_query)
-            cards_dict = {card.id: card for card in cards_result.scalars()}
+            cards_dict = await self._get_cards_by_ids(
+                [card_id for card_id, _ in top_cards]
+            )
 
             result = []
             for card_id, count in top_cards:
@@ -737,31 +1005,66 @@ class TarotRepository(BaseRepository[TarotReading], ITarotReadingRepository):
         """
         Получение популярных раскладов.
 
+        Читает снимок из материализованного представления mv_popular_spreads,
+        а не сортирует tarot_spreads по usage_count.
+
         Args:
             limit: Количество раскладов
 
         Returns:
             Список популярных раскладов
         """
-        query = select(
-            TarotSpread,
-            TarotSpread.usage_count
-        ).where(
-            TarotSpread.is_active == True
-        ).order_by(
-            TarotSpread.usage_count.desc()
+        query = select(PopularSpread).order_by(
+            PopularSpread.usage_count.desc()
         ).limit(limit)
 
         result = await self.session.execute(query)
 
         popular = []
-        for spread, count in result:
+        for spread in result.scalars():
             popular.append({
                 "code": spread.code,
                 "name": spread.name,
                 "card_count": spread.card_count,
-                "usage_count": count,
+                "usage_count": spread.usage_count,
                 "is_premium": spread.is_premium
             })
 
-        return popular
\ No newline at end of file
+        return popular
+
+    async def refresh_popular_spreads(self) -> None:
+        """
+        Обновление материализованного представления рейтинга раскладов.
+
+        CONCURRENTLY не блокирует чтение рейтинга во время обновления.
+        """
+        await self.session.execute(
+            text("REFRESH MATERIALIZED VIEW CONCURRENTLY mv_popular_spreads")
+        )
+        logger.info("Рейтинг популярных раскладов обновлен")
+
+
+def _invalidate_deck_on_card_change(mapper, connection, target: TarotCard) -> None:
+    """
+    Сброс кэша карт колоды после фиксации изменения карты через ORM.
+
+    Args:
+        mapper: Маппер TarotCard
+        connection: Соединение
+        target: Измененная карта
+    """
+    session = object_session(target)
+    if session is None:
+        TarotRepository.invalidate_deck(target.deck_id)
+        return
+
+    deck_id = target.deck_id
+
+    async def invalidate() -> None:
+        TarotRepository.invalidate_deck(deck_id)
+
+    session.info.setdefault(AFTER_COMMIT_KEY, {})[f"deck:{deck_id}"] = invalidate
+
+
+for _event_name in ('after_insert', 'after_update', 'after_delete'):
+    event.listen(TarotCard, _event_name, _invalidate_deck_on_card_change)
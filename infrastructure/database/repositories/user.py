@@ -9,7 +9,7 @@
 - Методы для аналитики и отчетов
 """
 
-from typing import Optional, List, Dict, Any, Tuple
+from typing import Optional, List, Dict, Any, Sequence, Tuple
 from datetime import datetime, date, timedelta
 from sqlalchemy import select, func, and_, or_, update, case
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -23,8 +23,9 @@ from infrastructure.database.models import (
     User, UserBirthData, UserSettings, UserConsent,
     Subscription, Payment
 )
+from infrastructure.database.models.user import DAILY_READINGS_LIMITS
 from infrastructure.database.repositories.base import BaseRepository
-from core.exceptions import EntityNotFoundError, ValidationError
+from core.exceptions import EntityNotFoundError, DailyLimitReachedError
 
 
 class UserRepository(BaseRepository[User], IUserRepository):
@@ -73,6 +74,36 @@ class UserRepository(BaseRepository[User], IUserRepository):
 
         return user
 
+    async def get_users_by_telegram_ids(
+            self,
+            telegram_ids: Sequence[int]
+    ) -> Dict[int, User]:
+        """
+        Получение пользователей по списку Telegram ID одним запросом.
+
+        Args:
+            telegram_ids: ID пользователей в Telegram
+
+        Returns:
+            Словарь telegram_id -> пользователь (ненайденные ID отсутствуют)
+        """
+        if not telegram_ids:
+            return {}
+
+        query = select(User).where(
+            User.telegram_id.in_(telegram_ids)
+        ).options(
+            selectinload(User.birth_data),
+            selectinload(User.settings),
+            selectinload(User.consents)
+        )
+
+        result = await self.session.execute(query)
+        users = {user.telegram_id: user for user in result.scalars()}
+
+        logger.debug(f"Найдено {len(users)} из {len(telegram_ids)} пользователей")
+        return users
+
     async def get_by_username(self, username: str) -> Optional[User]:
         """
         Получение пользователя по username.
@@ -314,10 +345,7 @@ class UserRepository(BaseRepository[User], IUserRepository):
         """
         user = await self.get_by_id_or_fail(user_id)
 
-        today = date.today()
-        if user.daily_readings_date != today:
-            user.daily_readings_count = 0
-            user.daily_readings_date = today
+        if user.reset_daily_if_needed():
             await self.session.flush()
             logger.debug(f"Сброшены дневные лимиты пользователя {user_id}")
 
@@ -334,34 +362,36 @@ class UserRepository(BaseRepository[User], IUserRepository):
             True если лимит не превышен
 
         Raises:
-            ValidationError: При превышении лимита
+            DailyLimitReachedError: При превышении лимита
         """
         user = await self.check_and_reset_daily_limits(user_id)
 
         # Проверка лимитов
-        limits = {
-            SubscriptionTier.FREE: 3,
-            SubscriptionTier.BASIC: 10,
-            SubscriptionTier.PREMIUM: 50,
-            SubscriptionTier.VIP: 999999
-        }
-
-        limit = limits.get(user.subscription_tier, 3)
+        limit = DAILY_READINGS_LIMITS.get(user.subscription_tier, 3)
 
         if user.daily_readings_count >= limit:
-            raise ValidationError(
-                f"Превышен дневной лимит раскладов ({limit})",
-                user_message="Вы исчерпали дневной лимит раскладов. "
-                             "Попробуйте завтра или улучшите подписку."
+            raise DailyLimitReachedError("раскладов", limit, user.daily_readings_count)
+
+        # Атомарно увеличиваем счетчики одним UPDATE. Условие на лимит
+        # повторяется в WHERE: параллельный запрос мог успеть увеличить
+        # счетчик после проверки выше.
+        result = await self.session.execute(
+            update(User)
+            .where(
+                User.id == user_id,
+                User.daily_readings_count < limit
             )
-
-        # Увеличиваем счетчики
-        user.daily_readings_count += 1
-        user.total_readings += 1
-        user.last_activity_at = datetime.utcnow()
-
-        await self.session.flush()
-        logger.debug(f"Пользователь {user_id}: расклад {user.daily_readings_count}/{limit}")
+            .values(
+                daily_readings_count=User.daily_readings_count + 1,
+                total_readings=User.total_readings + 1,
+                last_activity_at=func.now()
+            )
+            .returning(User.daily_readings_count)
+        )
+        daily_count = result.scalar_one_or_none()
+        if daily_count is None:
+            raise DailyLimitReachedError("раскладов", limit, limit)
+        logger.debug(f"Пользователь {user_id}: расклад {daily_count}/{limit}")
 
         return True
 
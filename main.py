@@ -161,7 +161,9 @@ class AstroTarotBot:
         """Инициализация базы данных."""
         try:
             from infrastructure.database import init_database
+            from infrastructure.database.repositories import warmup
             await init_database()
+            await warmup(min(5, self.settings.database.pool_size))
             logger.info("Database initialized")
         except ImportError:
             logger.warning("Database module not found, skipping DB initialization")
@@ -267,6 +269,15 @@ class AstroTarotBot:
                     replace_existing=True
                 )
 
+            # Обновление рейтинга популярных раскладов
+            scheduler.add_job(
+                self._refresh_popular_spreads,
+                'interval',
+                minutes=15,
+                id='refresh_popular_spreads',
+                replace_existing=True
+            )
+
             # Сбор аналитики
             if self.settings.features.enable_analytics:
                 scheduler.add_job(
@@ -488,6 +499,16 @@ class AstroTarotBot:
                 await self.bot.session.close()
                 logger.info("Bot session closed")
 
+            # Дописываем отложенные расклады и предупреждения UoW
+            try:
+                from infrastructure.database.repositories import (
+                    flush_uow_logs, write_batcher
+                )
+                await write_batcher.stop()
+                await flush_uow_logs()
+            except ImportError:
+                pass
+
             # Закрываем инфраструктуру
             await shutdown_infrastructure()
 
@@ -547,6 +568,14 @@ class AstroTarotBot:
         except Exception as e:
             logger.error(f"Database backup failed: {e}")
 
+    async def _refresh_popular_spreads(self):
+        """Обновление материализованного рейтинга раскладов."""
+        try:
+            async with get_unit_of_work() as uow:
+                await uow.tarot.refresh_popular_spreads()
+        except Exception as e:
+            logger.error(f"Failed to refresh popular spreads: {e}")
+
     async def _collect_analytics(self):
         """Сбор аналитики."""
         try: